@@ -1,8 +1,11 @@
-import pandas as pd
-import matplotlib.pyplot as plt
 import polars as pl
 import io
 
+from polars_cookbook.startup import pyplot
+
+# matplotlib is imported on the first plot (never with COOKBOOK_HEADLESS=1)
+plt = pyplot()
+
 """
 # Reading data from a csv file
 # You can read data from a CSV file using the `read_csv` function. By default, it assumes that the fields are comma-separated.
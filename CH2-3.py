@@ -1,6 +1,10 @@
-import pandas as pd
 import polars as pl
-import matplotlib.pyplot as plt
+
+from polars_cookbook import QueryCache, SpaceSaving, frame_fingerprint
+from polars_cookbook.startup import pyplot
+
+# matplotlib is imported on the first plot (never with COOKBOOK_HEADLESS=1)
+plt = pyplot()
 
 # Chapter2
 
@@ -36,6 +40,14 @@ pl_complaint_counts = (
 )
 pl_complaint_counts
 
+# For a continuously arriving feed the exact count needs every value in memory.
+# A Space-Saving sketch keeps an approximate top 10 in constant memory, updated
+# batch by batch; `count - error` is a lower bound on the true count.
+pl_complaint_heavy_hitters = SpaceSaving(capacity=100)
+for batch in pl_complaints.iter_slices(10_000):
+    pl_complaint_heavy_hitters.update(batch["Complaint Type"])
+pl_complaint_heavy_hitters.top_k(10)
+
 """ 
 complaint_counts[:10].plot(kind="bar")
 plt.title("Top 10 Complaint Types")
@@ -67,6 +79,11 @@ pl_complaints = pl.read_csv(
 
 pl_complaints
 
+# Re-running the cells below recomputes the same aggregations, so memoise them
+# on the data fingerprint plus the query plan.
+query_cache = QueryCache(maxsize=32)
+pl_complaints_fingerprint = frame_fingerprint(pl_complaints)
+
 """ 
 complaints[:5]
 """
@@ -91,7 +108,12 @@ complaints[is_noise & in_brooklyn][:5]
 
 pl_is_noise = pl.col("Complaint Type") == "Noise - Street/Sidewalk"
 pl_in_brooklyn = pl.col("Borough") == "BROOKLYN"
-pl_complaints.filter(pl_is_noise & pl_in_brooklyn).head(5)
+pl_noise_in_brooklyn = query_cache.collect(
+    pl_complaints,
+    lambda lf: lf.filter(pl_is_noise & pl_in_brooklyn),
+    fingerprint=pl_complaints_fingerprint,
+)
+pl_noise_in_brooklyn.head(5)
 
 """ 
 complaints[is_noise & in_brooklyn][
@@ -99,7 +121,7 @@ complaints[is_noise & in_brooklyn][
 ][:10]
 """
 
-pl_complaints.filter(pl_is_noise & pl_in_brooklyn).select(
+pl_noise_in_brooklyn.select(
     ["Complaint Type", "Borough", "Created Date", "Descriptor"]
 ).head(10)
 
@@ -122,23 +144,28 @@ complaint_counts = complaints["Borough"].value_counts()
 noise_complaint_counts / complaint_counts.astype(float)
 """
 
-alphabetical_pl_noise_complaints = (
-    pl_complaints.filter(pl.col("Complaint Type") == "Noise - Street/Sidewalk")
-    .select(pl.col("Borough").value_counts())
-    .unnest("Borough")
-    .sort("Borough")
-)
-alphabetical_pl_complaint_counts = (
-    pl_complaints.select(pl.col("Borough").value_counts())
-    .unnest("Borough")
-    .sort("Borough")
-)
-pl_noise_complaint_fraction = alphabetical_pl_noise_complaints.join(
-    alphabetical_pl_complaint_counts, on="Borough"
+def noise_complaint_fraction(lf):
+    alphabetical_pl_noise_complaints = (
+        lf.filter(pl.col("Complaint Type") == "Noise - Street/Sidewalk")
+        .select(pl.col("Borough").value_counts())
+        .unnest("Borough")
+        .sort("Borough")
+    )
+    alphabetical_pl_complaint_counts = (
+        lf.select(pl.col("Borough").value_counts()).unnest("Borough").sort("Borough")
+    )
+    return (
+        alphabetical_pl_noise_complaints.join(
+            alphabetical_pl_complaint_counts, on="Borough"
+        )
+        .with_columns((pl.col("count") / pl.col("count_right")).alias("count_ratio"))
+        .select(["Borough", "count_ratio"])
+    )
+
+
+pl_noise_complaint_fraction = query_cache.collect(
+    pl_complaints, noise_complaint_fraction, fingerprint=pl_complaints_fingerprint
 )
-pl_noise_complaint_fraction = pl_noise_complaint_fraction.with_columns(
-    (pl.col("count") / pl.col("count_right")).alias("count_ratio")
-).select(["Borough", "count_ratio"])
 pl_noise_complaint_fraction
 
 """ 
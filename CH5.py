@@ -1,14 +1,37 @@
 # %%
-import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
 import polars as pl
 import io
 import requests
 
-plt.style.use("ggplot")
-plt.rcParams["figure.figsize"] = (15, 3)
-plt.rcParams["font.family"] = "sans-serif"
+from polars_cookbook import (
+    BucketedQuantiles,
+    ConcatSink,
+    Profiler,
+    TimeIndexedFrame,
+    WeatherRollups,
+    fetch_bytes,
+    has_conditions,
+    read_weather_csv,
+    with_condition_mask,
+)
+from polars_cookbook.startup import pyplot
+from polars_cookbook.weather_pipeline import clean_month
+
+# Records where the time goes in the download pipeline below.
+# Pass capture_plans=True to also keep the query plan of lazy stages.
+profiler = Profiler()
+
+
+def style_plots(plt):
+    plt.style.use("ggplot")
+    plt.rcParams["figure.figsize"] = (15, 3)
+    plt.rcParams["font.family"] = "sans-serif"
+
+
+# matplotlib is imported and styled on the first plot (never with
+# COOKBOOK_HEADLESS=1)
+plt = pyplot(style_plots)
 
 '''
 # %%
@@ -38,6 +61,31 @@ plt.title("Hourly Temperature in 2012")
 plt.legend()
 plt.show()
 
+# The frame is sorted by date_time, so a time window is a binary search away
+# rather than a full-scan filter
+weather_2012_index = TimeIndexedFrame(weather_2012_final, "date_time")
+print(weather_2012_index.window("2012-03-01", "2012-04-01").head())
+print(weather_2012_index.asof("2012-03-21 14:37"))
+
+# Month, month-by-hour and day summaries, built once and merged month by
+# month; queries read the smallest table that can answer them
+weather_2012_rollups = WeatherRollups("date_time", ["temperature_c"])
+for _, weather_month in weather_2012_final.group_by(
+    pl.col("date_time").dt.month(), maintain_order=True
+):
+    weather_2012_rollups.append(weather_month)
+print(weather_2012_rollups.query(by="month"))
+print(weather_2012_rollups.query(by="hour", start="2012-03-01", end="2012-04-01"))
+
+# The ~50 distinct weather descriptions are tokenised once into condition
+# bitmasks; "snow and fog" is then an integer AND instead of two substring scans
+weather_2012_conditions = with_condition_mask(weather_2012_final)
+print(
+    weather_2012_conditions.group_by(pl.col("date_time").dt.month().alias("month"))
+    .agg(has_conditions("Snow", "Fog").sum().alias("snow_and_fog_hours"))
+    .sort("month")
+)
+
 
 '''
 # %%
@@ -255,6 +303,13 @@ hourly_median_temps = temperatures.group_by("Hour").agg(
 
 hourly_median_temps = hourly_median_temps.sort("Hour")
 
+# The exact median needs every value per hour in memory. A t-digest per hour
+# gives approximate medians and percentiles, can be updated as new months
+# arrive and merged across stations and years.
+hourly_temperature_sketches = BucketedQuantiles(pl.col("date/time (lst)").dt.hour())
+hourly_temperature_sketches.update(pl_weather_mar2012_cleaned, "temperature_c")
+print(hourly_temperature_sketches.quantiles([0.1, 0.5, 0.9]))
+
 hours = hourly_median_temps["Hour"].to_list()
 median_temps = hourly_median_temps["median_temperature"].to_list()
 
@@ -314,43 +369,11 @@ download_weather_month(2012, 1)[:5]
 
 # TODO: redefine these functions using polars and your code above
 def clean_data_polars(df):
-    non_empty_columns = []
-
-    for col in df.columns:
-        null_count = df[col].null_count()
-
-        if null_count == 0:
-            # Check for empty strings only for string columns
-            if df[col].dtype == pl.Utf8:  # Only check if it's a string column
-                empty_string_count = (df[col] == "").sum()
-            else:
-                empty_string_count = 0
-
-            if empty_string_count == 0:
-                non_empty_columns.append(col)
-
-    df = df.select(non_empty_columns)
-    
-    df = df.drop(["Year", "Month", "Day", "Time (LST)"])
-
-    cleaned_columns = [col.replace('ï»¿"', "").replace("Â", "") for col in df.columns]
-    df = df.rename({old: new for old, new in zip(df.columns, cleaned_columns)})
-
-    column_renames = {
-        "Longitude (x)": "longitude",
-        "Latitude (y)": "latitude",
-        "Station Name": "station_name",
-        "Climate ID": "climate_id",
-        "Date/Time (LST)": "date_time_lst",
-        "Temp (°C)": "temperature_c",
-        "Dew Point Temp (°C)": "dew_point_temp_c",
-        "Rel Hum (%)": "relative_humidity",
-        "Wind Spd (km/h)": "wind_speed_kmh",
-        "Visibility (km)": "visibility_km",
-        "Stn Press (kPa)": "station_pressure_kpa",
-        "Weather": "weather",
-    }
-    df = df.rename(column_renames)
+    with profiler.stage("drop_empty_columns", rows=df.height):
+        # Drops columns with nulls or empty strings (counted in one select) and
+        # the split date parts; headers are already canonical (see
+        # read_weather_csv), so no renames
+        df = clean_month(df)
 
     return df
 
@@ -358,17 +381,22 @@ def download_weather_month_polars(year, month):
     url_template = "http://climate.weather.gc.ca/climate_data/bulk_data_e.html?format=csv&stationID=5415&Year={year}&Month={month}&timeframe=1&submit=Download+Data"
     url = url_template.format(year=year, month=month)
 
-    # Fetch data from URL
-    response = requests.get(url)
-    csv_data = io.StringIO(response.text)
+    # Fetch data from URL, gzip-compressed on the wire, straight into bytes
+    with profiler.stage("fetch", month=month) as record:
+        body, record["bytes_in"] = fetch_bytes(url)
 
-    # Read CSV using Polars
-    df = pl.read_csv(csv_data, encoding="latin1")
+    # Decode with the encoding detected from the BOM and map the headers to
+    # snake_case names while reading
+    with profiler.stage("decode", month=month) as record:
+        df = read_weather_csv(body)
+        record["rows"] = df.height
+        record["bytes_out"] = df.estimated_size()
 
     # Parse datetime column
-    df = df.with_columns(
-        pl.col("Date/Time (LST)").str.strptime(pl.Datetime, "%Y-%m-%d %H:%M")
-    )
+    with profiler.stage("strptime", month=month):
+        df = df.with_columns(
+            pl.col("date_time_lst").str.strptime(pl.Datetime, "%Y-%m-%d %H:%M")
+        )
 
     # Clean data using the custom function
     df = clean_data_polars(df)
@@ -389,13 +417,17 @@ weather_2012.head()
 
 
 # TODO: do the same with polars
-pl_data_by_month = [download_weather_month_polars(2012, i) for i in range(1, 13)]
-
-# Concatenate the monthly DataFrames into one DataFrame
-pl_weather_2012 = pl.concat(pl_data_by_month)
+# Each month is appended to one Parquet file as soon as it is cleaned, so only
+# one month is held in memory at a time instead of all twelve
+with ConcatSink("data/pl_weather_2012.parquet") as sink:
+    for i in range(1, 13):
+        pl_weather_month = download_weather_month_polars(2012, i)
+        with profiler.stage("concat", month=i, rows=pl_weather_month.height):
+            sink.write(pl_weather_month)
+pl_weather_2012 = sink.scan()
 
-# Display the first few rows of the concatenated DataFrame
-print(pl_weather_2012.head(5))
+# Display the first few rows of the concatenated data
+print(pl_weather_2012.head(5).collect())
 
 
 '''
@@ -405,4 +437,9 @@ weather_2012.to_csv("../data/weather_2012.csv")
 '''
 
 # TODO: use polars to save the data.
-pl_weather_2012.write_csv("data/pl_weather_2012.csv")
\ No newline at end of file
+with profiler.stage("write", rows=sink.rows):
+    pl_weather_2012.sink_csv("data/pl_weather_2012.csv")
+
+# Where did the time go? The trace opens in chrome://tracing or ui.perfetto.dev.
+print(profiler.summary())
+profiler.write_chrome_trace("data/pl_weather_2012_trace.json")
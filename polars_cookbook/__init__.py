@@ -0,0 +1,125 @@
+"""Helpers shared by the Polars chapters of the cookbook.
+
+The chapter scripts (CH1.py, CH2-3.py, CH5.py) are meant to be read top to
+bottom; anything reusable across chapters lives here instead.
+
+Submodules are imported on first attribute access (PEP 562), so
+``import polars_cookbook`` stays cheap and ``python -m
+polars_cookbook.<module>`` runs a module the package has not imported yet.
+"""
+
+import importlib
+
+# exported name -> submodule that defines it
+_EXPORTS = {
+    "OnlineAnomalyDetector": "anomalies",
+    "rolling_anomalies": "anomalies",
+    "BikeMatrix": "bikes_matrix",
+    "daily_weather": "bikes_weather",
+    "join_bikes_weather": "bikes_weather",
+    "load_bikes": "bikes_weather",
+    "read_csv_chunked": "chunked_csv",
+    "has_conditions": "conditions",
+    "with_condition_mask": "conditions",
+    "fetch_bytes": "download",
+    "ComplaintFeedProcessor": "feed311",
+    "clean_incident_zip": "feed311",
+    "profile_frame": "frame_profile",
+    "detect_encoding": "headers",
+    "read_weather_csv": "headers",
+    "from_pandas": "interop",
+    "to_pandas": "interop",
+    "Manifest": "manifest",
+    "Pipeline": "manifest",
+    "partition_fingerprints": "manifest",
+    "QueryCache": "memo",
+    "file_fingerprint": "memo",
+    "frame_fingerprint": "memo",
+    "stable_fingerprint": "memo",
+    "ParityCase": "parity",
+    "run_parity": "parity",
+    "read_popcon": "popcon",
+    "read_popcon_archive": "popcon",
+    "write_popcon_archive": "popcon",
+    "PopconFleet": "popcon_fleet",
+    "fleet_summary": "popcon_fleet",
+    "Profiler": "profiling",
+    "BucketedQuantiles": "quantiles",
+    "TDigest": "quantiles",
+    "Chart": "reports",
+    "render_charts": "reports",
+    "WeatherRollups": "rollups",
+    "SpaceSaving": "sketches",
+    "ConcatSink": "spill",
+    "concat_to_disk": "spill",
+    "LazyModule": "startup",
+    "pyplot": "startup",
+    "TimeIndexedFrame": "timeindex",
+    "infer_csv_schema": "typed_csv",
+    "read_csv_typed": "typed_csv",
+    "download_year": "weather_pipeline",
+    "run_pipeline": "weather_pipeline",
+}
+
+__all__ = [
+    "BikeMatrix",
+    "BucketedQuantiles",
+    "Chart",
+    "ComplaintFeedProcessor",
+    "ConcatSink",
+    "LazyModule",
+    "Manifest",
+    "OnlineAnomalyDetector",
+    "ParityCase",
+    "Pipeline",
+    "PopconFleet",
+    "Profiler",
+    "QueryCache",
+    "SpaceSaving",
+    "TDigest",
+    "TimeIndexedFrame",
+    "WeatherRollups",
+    "clean_incident_zip",
+    "concat_to_disk",
+    "daily_weather",
+    "detect_encoding",
+    "download_year",
+    "fetch_bytes",
+    "file_fingerprint",
+    "fleet_summary",
+    "from_pandas",
+    "frame_fingerprint",
+    "has_conditions",
+    "infer_csv_schema",
+    "join_bikes_weather",
+    "load_bikes",
+    "partition_fingerprints",
+    "profile_frame",
+    "pyplot",
+    "read_csv_chunked",
+    "read_csv_typed",
+    "read_popcon",
+    "read_popcon_archive",
+    "read_weather_csv",
+    "render_charts",
+    "rolling_anomalies",
+    "run_parity",
+    "run_pipeline",
+    "stable_fingerprint",
+    "to_pandas",
+    "with_condition_mask",
+    "write_popcon_archive",
+]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{module}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted([*globals(), *__all__])
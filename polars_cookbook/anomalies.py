@@ -0,0 +1,226 @@
+"""Rolling statistics and anomaly flags for counter and temperature series.
+
+``rolling_anomalies`` computes, for every value column at once, the mean,
+standard deviation, median and median absolute deviation (MAD) of the
+trailing window (the current row excluded, so an outage cannot hide
+itself). It then flags rows whose z-score or robust z-score is too large.
+
+``OnlineAnomalyDetector`` does the same over a fixed number of trailing
+observations for data that arrives in appends. Each step costs O(log
+window) plus a list insert and remove: the mean and standard deviation
+come from running sums, and the median and MAD from a sorted copy of the
+window. The sums are taken relative to a shift and recomputed from the
+window once per ``window`` appends, so rounding error cannot accumulate.
+"""
+
+from bisect import bisect_left, insort
+
+import numpy as np
+import polars as pl
+
+# Scales the MAD to the standard deviation of a normal distribution
+MAD_SCALE = 1.4826
+
+
+def _numeric_columns(df, index_column):
+    return [
+        name
+        for name, dtype in df.schema.items()
+        if name != index_column and dtype.is_numeric()
+    ]
+
+
+def rolling_anomalies(
+    df, index_column, period, columns=None, threshold=3.0, robust_threshold=3.5,
+    min_samples=7,
+):
+    """Add ``<col>_mean/_std/_median/_mad/_z/_robust_z/_anomaly`` columns.
+
+    ``period`` is a Polars duration such as "28d" for the daily bike counts
+    or "7d" for hourly temperatures. ``df`` must be sorted by ``index_column``.
+    """
+    columns = columns or _numeric_columns(df, index_column)
+    stats = df.rolling(index_column, period=period, closed="left").agg(
+        *[
+            expr
+            for c in columns
+            for expr in (
+                pl.col(c).count().alias(f"{c}_n"),
+                pl.col(c).mean().alias(f"{c}_mean"),
+                pl.col(c).std().alias(f"{c}_std"),
+                pl.col(c).median().alias(f"{c}_median"),
+                (pl.col(c) - pl.col(c).median()).abs().median().alias(f"{c}_mad"),
+            )
+        ]
+    )
+    scores = []
+    for c in columns:
+        enough = pl.col(f"{c}_n") >= min_samples
+        z = (pl.col(c) - pl.col(f"{c}_mean")) / pl.col(f"{c}_std")
+        robust_z = (pl.col(c) - pl.col(f"{c}_median")) / (
+            MAD_SCALE * pl.col(f"{c}_mad")
+        )
+        # A window without spread has no z-score (0/0 is NaN, and NaN > x is
+        # true in Polars), so a constant series is never flagged
+        scores += [
+            pl.when(enough & (pl.col(f"{c}_std") > 0)).then(z).alias(f"{c}_z"),
+            pl.when(enough & (pl.col(f"{c}_mad") > 0)).then(robust_z).alias(f"{c}_robust_z"),
+        ]
+    flags = [
+        (
+            (pl.col(f"{c}_z").abs() > threshold)
+            | (pl.col(f"{c}_robust_z").abs() > robust_threshold)
+        )
+        .fill_null(False)
+        .alias(f"{c}_anomaly")
+        for c in columns
+    ]
+    return (
+        df.hstack(stats.drop(index_column))
+        .with_columns(scores)
+        .with_columns(flags)
+        .drop([f"{c}_n" for c in columns])
+    )
+
+
+def _kth_smallest(a, na, b, nb, k):
+    """The ``k``-th smallest (0-based) of two ascending sequences given as getters."""
+    lo, hi = max(0, k + 1 - nb), min(k + 1, na)
+    while lo < hi:
+        i = (lo + hi) // 2
+        if a(i) < b(k - i):
+            lo = i + 1
+        else:
+            hi = i
+    candidates = []
+    if lo > 0:
+        candidates.append(a(lo - 1))
+    if k + 1 - lo > 0:
+        candidates.append(b(k - lo))
+    return max(candidates)
+
+
+class _Window:
+    """The last ``size`` values of one column: running sums and a sorted copy."""
+
+    def __init__(self, size):
+        self.size = size
+        self.ring = [0.0] * size
+        self.sorted = []
+        self.pushed = 0
+        self.shift = 0.0
+        self.total = 0.0
+        self.squares = 0.0
+
+    def push(self, value):
+        slot = self.pushed % self.size
+        if self.pushed >= self.size:
+            old = self.ring[slot]
+            del self.sorted[bisect_left(self.sorted, old)]
+            self.total -= old - self.shift
+            self.squares -= (old - self.shift) ** 2
+        elif self.pushed == 0:
+            self.shift = value
+        self.ring[slot] = value
+        insort(self.sorted, value)
+        self.total += value - self.shift
+        self.squares += (value - self.shift) ** 2
+        self.pushed += 1
+        if self.pushed % self.size == 0:
+            # Re-sum around the current median so rounding error cannot build up
+            self.shift = self.median()
+            self.total = sum(v - self.shift for v in self.sorted)
+            self.squares = sum((v - self.shift) ** 2 for v in self.sorted)
+
+    def __len__(self):
+        return len(self.sorted)
+
+    def mean_std(self):
+        n = len(self.sorted)
+        mean = self.shift + self.total / n
+        if self.sorted[0] == self.sorted[-1]:
+            # Exactly constant; the sums could leave a rounding-sized variance
+            return mean, 0.0
+        variance = (self.squares - self.total**2 / n) / (n - 1)
+        return mean, max(variance, 0.0) ** 0.5
+
+    def _middle(self, kth, n):
+        if n % 2:
+            return kth(n // 2)
+        return (kth(n // 2 - 1) + kth(n // 2)) / 2
+
+    def median(self):
+        return self._middle(self.sorted.__getitem__, len(self.sorted))
+
+    def mad(self, median):
+        """Median absolute deviation, by selection over the two sides of ``median``."""
+        values = self.sorted
+        split = bisect_left(values, median)
+
+        def below(i):
+            return median - values[split - 1 - i]
+
+        def above(i):
+            return values[split + i] - median
+
+        def kth(k):
+            return _kth_smallest(below, split, above, len(values) - split, k)
+
+        return self._middle(kth, len(values))
+
+
+class OnlineAnomalyDetector:
+    """Rolling z-scores over the last ``window`` observations, fed by appends.
+
+    Example:
+        detector = OnlineAnomalyDetector(["Berri 1", "Rachel1"], window=28)
+        for batch in new_days:
+            flagged = detector.update(batch)
+
+    Missing readings are scored as null and are not added to the window.
+    Each column keeps its own last ``window`` valid observations.
+    """
+
+    def __init__(self, columns, window=28, threshold=3.0, robust_threshold=3.5,
+                 min_samples=7):
+        self.columns = list(columns)
+        self.window = window
+        self.threshold = threshold
+        self.robust_threshold = robust_threshold
+        self.min_samples = min_samples
+        self._windows = [_Window(window) for _ in self.columns]
+
+    def _score(self, j, value):
+        current = self._windows[j]
+        if len(current) < max(self.min_samples, 2) or np.isnan(value):
+            return np.nan, np.nan
+        mean, std = current.mean_std()
+        median = current.median()
+        mad = current.mad(median)
+        # No spread in the window: no score, as in rolling_anomalies
+        z = (value - mean) / std if std > 0 else np.nan
+        robust_z = (value - median) / (MAD_SCALE * mad) if mad > 0 else np.nan
+        return z, robust_z
+
+    def update(self, batch):
+        """Score ``batch`` against the trailing window, then append it."""
+        values = batch.select(self.columns).cast(pl.Float64).to_numpy()
+        z = np.full(values.shape, np.nan)
+        robust_z = np.full(values.shape, np.nan)
+        for i, row in enumerate(values):
+            for j, value in enumerate(row.tolist()):
+                z[i, j], robust_z[i, j] = self._score(j, value)
+                if not np.isnan(value):
+                    self._windows[j].push(value)
+        flags = (np.abs(z) > self.threshold) | (np.abs(robust_z) > self.robust_threshold)
+        return batch.with_columns(
+            *[
+                pl.Series(f"{c}_z", z[:, j], nan_to_null=True)
+                for j, c in enumerate(self.columns)
+            ],
+            *[
+                pl.Series(f"{c}_robust_z", robust_z[:, j], nan_to_null=True)
+                for j, c in enumerate(self.columns)
+            ],
+            *[pl.Series(f"{c}_anomaly", flags[:, j]) for j, c in enumerate(self.columns)],
+        )
@@ -0,0 +1,108 @@
+"""Dense array representation of the bike counter table.
+
+``bikes.csv`` is a date x counter matrix of small non-negative integers,
+with some counters that never reported. ``BikeMatrix`` drops those columns
+and keeps the counts as one NumPy block of the narrowest unsigned dtype.
+Per-path totals, correlations and weekday profiles are then single
+vectorised reductions over that block.
+"""
+
+import numpy as np
+import polars as pl
+
+from polars_cookbook.bikes_weather import load_bikes
+
+
+def smallest_unsigned_dtype(max_value):
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if max_value <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    raise OverflowError(f"{max_value} does not fit in an unsigned 64-bit integer")
+
+
+class BikeMatrix:
+    """Counts as a ``(days, paths)`` unsigned integer array with a date index.
+
+    ``missing`` marks the cells that were empty in the CSV (stored as 0); it is
+    None when there were none. The reductions leave those cells out.
+    """
+
+    def __init__(self, dates, paths, counts, missing=None):
+        self.dates = dates
+        self.paths = paths
+        self.counts = counts
+        self.missing = missing
+
+    @classmethod
+    def from_frame(cls, df, date_column="Date"):
+        counters = df.drop(date_column)
+        counters = counters.select(
+            [s.name for s in counters if s.null_count() < counters.height]
+        )
+        missing = counters.select(pl.all().is_null()).to_numpy()
+        values = counters.fill_null(0).to_numpy()
+        if values.size and values.min() < 0:
+            # An unsigned cast would silently wrap them to huge counts
+            raise ValueError("bike counts must be non-negative")
+        dtype = smallest_unsigned_dtype(int(values.max()) if values.size else 0)
+        return cls(
+            dates=df[date_column].to_numpy().astype("datetime64[D]"),
+            paths=counters.columns,
+            # Column-major, so every path is one contiguous run of memory
+            counts=np.asfortranarray(values.astype(dtype)),
+            missing=missing if missing.any() else None,
+        )
+
+    @classmethod
+    def load(cls, path="data/bikes.csv"):
+        return cls.from_frame(load_bikes(path))
+
+    @property
+    def nbytes(self):
+        return self.counts.nbytes + self.dates.nbytes
+
+    def _observed(self):
+        """Boolean ``(days, paths)`` array, False where the CSV cell was empty."""
+        if self.missing is None:
+            return np.ones(self.counts.shape, dtype=bool)
+        return ~self.missing
+
+    def totals(self):
+        """Cyclists per path over the days each path reported."""
+        observed = np.where(self._observed(), self.counts, 0)
+        return dict(zip(self.paths, observed.sum(axis=0, dtype=np.uint64).tolist()))
+
+    def correlations(self):
+        """Pearson correlation between the paths, as a ``(paths, paths)`` array.
+
+        Days on which a path did not report are masked out (``np.ma.corrcoef``).
+        """
+        if self.missing is None:
+            return np.corrcoef(self.counts, rowvar=False)
+        masked = np.ma.masked_array(self.counts.astype(np.float64), mask=self.missing)
+        return np.ma.corrcoef(masked, rowvar=False).filled(np.nan)
+
+    def weekdays(self):
+        # 1970-01-01 was a Thursday; shift so that Monday is 0
+        return (self.dates.astype(np.int64) + 3) % 7
+
+    def weekday_profile(self):
+        """Mean count per weekday (rows, Monday first) and path (columns).
+
+        Missing cells count neither as rides nor as days.
+        """
+        one_hot = np.eye(7, dtype=np.float64)[self.weekdays()]
+        observed = self._observed()
+        sums = one_hot.T @ np.where(observed, self.counts, 0)
+        days = one_hot.T @ observed.astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return sums / days
+
+    def to_frame(self):
+        df = pl.DataFrame(self.counts, schema=self.paths)
+        if self.missing is not None:
+            df = df.with_columns(
+                pl.when(~pl.Series(self.missing[:, j])).then(pl.col(path)).alias(path)
+                for j, path in enumerate(self.paths)
+            )
+        return df.insert_column(0, pl.Series("Date", self.dates))
@@ -0,0 +1,120 @@
+"""Combining the daily bike counts with the hourly weather observations.
+
+The hourly weather is first rolled up to days with a single
+``group_by_dynamic`` pass. Both sides are then sorted by date, so the join
+is a sorted merge (``join_asof`` with zero tolerance) rather than a hash
+join. Passing ``by`` (e.g. a station column) handles several stations at
+once.
+
+Run ``python -m polars_cookbook.bikes_weather`` for a benchmark on
+synthetic multi-year, multi-station data.
+"""
+
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import polars as pl
+
+
+def load_bikes(path="data/bikes.csv"):
+    """Read the Montréal bike counts with a parsed, sorted Date column."""
+    bikes = pl.read_csv(path, separator=";", encoding="latin1")
+    return bikes.with_columns(pl.col("Date").str.strptime(pl.Date, "%d/%m/%Y")).sort(
+        "Date"
+    )
+
+
+def daily_weather(weather, time_column="date_time", by=None):
+    """Roll hourly weather up to one row per day (and per ``by`` group)."""
+    weather = weather.sort([*(by or []), time_column])
+    daily = weather.group_by_dynamic(time_column, every="1d", group_by=by).agg(
+        mean_temperature_c=pl.col("temperature_c").mean(),
+        min_temperature_c=pl.col("temperature_c").min(),
+        max_temperature_c=pl.col("temperature_c").max(),
+        mean_relative_humidity=pl.col("relative_humidity").mean(),
+        mean_wind_speed_kmh=pl.col("wind_speed_kmh").mean(),
+        snow_fraction=pl.col("weather").str.contains("Snow").mean(),
+        rain_fraction=pl.col("weather").str.contains("Rain|Drizzle").mean(),
+    )
+    return daily.with_columns(pl.col(time_column).dt.date().alias("Date")).drop(
+        time_column
+    )
+
+
+def join_bikes_weather(bikes, daily, on="Date", by=None):
+    """Attach the daily weather to each day of bike counts.
+
+    Both frames must be sorted by ``on`` (within each ``by`` group). Days
+    without weather get nulls.
+    """
+    return bikes.join_asof(
+        daily,
+        on=on,
+        by=by,
+        strategy="backward",
+        tolerance=timedelta(0),
+        # Polars cannot verify sortedness within groups; callers sort first
+        check_sortedness=by is None,
+    )
+
+
+def synthetic_inputs(years=10, stations=20, seed=0):
+    """Hourly weather and daily counts for several stations and years."""
+    rng = np.random.default_rng(seed)
+    start = date(2000, 1, 1)
+    days = pl.date_range(start, date(2000 + years, 1, 1), "1d", closed="left", eager=True)
+    hours = pl.datetime_range(
+        start, date(2000 + years, 1, 1), "1h", closed="left", eager=True
+    )
+    names = [f"station_{i}" for i in range(stations)]
+    weather = pl.DataFrame(
+        {
+            "station_name": np.repeat(names, len(hours)),
+            "date_time": pl.concat([hours] * stations),
+            "temperature_c": rng.normal(5, 12, len(hours) * stations),
+            "relative_humidity": rng.integers(20, 100, len(hours) * stations),
+            "wind_speed_kmh": rng.integers(0, 60, len(hours) * stations),
+            "weather": rng.choice(["Clear", "Snow", "Rain", "Fog"], len(hours) * stations),
+        }
+    )
+    bikes = pl.DataFrame(
+        {
+            "station_name": np.repeat(names, len(days)),
+            "Date": pl.concat([days] * stations),
+            "count": rng.integers(0, 5000, len(days) * stations),
+        }
+    )
+    return bikes, weather
+
+
+def benchmark(years=10, stations=20):
+    """Time the daily roll-up and the sorted join against a hash join."""
+    bikes, weather = synthetic_inputs(years, stations)
+    by = ["station_name"]
+    timings = {"hourly_rows": weather.height, "daily_rows": bikes.height}
+
+    started = time.perf_counter()
+    daily = daily_weather(weather, by=by)
+    timings["daily_rollup_s"] = time.perf_counter() - started
+
+    bikes = bikes.sort([*by, "Date"])
+    started = time.perf_counter()
+    sorted_join = join_bikes_weather(bikes, daily, by=by)
+    timings["asof_join_s"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    hash_join = bikes.join(daily, on=[*by, "Date"], how="left")
+    timings["hash_join_s"] = time.perf_counter() - started
+
+    timings["same_result"] = sorted_join.sort([*by, "Date"]).equals(
+        hash_join.sort([*by, "Date"])
+    )
+    return timings
+
+
+if __name__ == "__main__":
+    weather_2012 = pl.read_csv("data/weather_2012.csv", try_parse_dates=True)
+    print(join_bikes_weather(load_bikes(), daily_weather(weather_2012)).head())
+    for years, stations in [(1, 1), (10, 20), (30, 50)]:
+        print(benchmark(years, stations))
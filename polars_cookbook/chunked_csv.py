@@ -0,0 +1,136 @@
+"""Parallel reader for large latin-1, semicolon-separated exports.
+
+The file is split into byte ranges that start and end on line boundaries.
+Worker threads read their range, transcode latin-1 to UTF-8 with NumPy and
+parse it with a fixed schema. NumPy and the Polars CSV parser both release
+the GIL, so the chunks really run in parallel. The parsed chunks are then
+stitched into one frame. Header lines repeated in the middle of the file,
+as in yearly exports concatenated together, are dropped.
+
+Run ``python -m polars_cookbook.chunked_csv`` for a scaling benchmark.
+"""
+
+import io
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import polars as pl
+
+
+def latin1_to_utf8(raw):
+    """Transcode latin-1 bytes to UTF-8 without going through a Python str.
+
+    Bytes below 0x80 are copied; every other byte becomes a two-byte sequence.
+    """
+    src = np.frombuffer(raw, dtype=np.uint8)
+    high = src >= 0x80
+    if not high.any():
+        return bytes(raw)
+    # Each byte moves right by the number of high bytes before it
+    positions = np.arange(src.size) + np.cumsum(high) - high
+    out = np.empty(src.size + int(high.sum()), dtype=np.uint8)
+    out[positions] = np.where(high, 0xC0 | (src >> 6), src)
+    out[positions[high] + 1] = 0x80 | (src[high] & 0x3F)
+    return out.tobytes()
+
+
+def split_byte_ranges(path, n_chunks):
+    """``(start, end)`` offsets after the header, aligned on newlines."""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header = f.readline()
+        starts = [len(header)]
+        for i in range(1, n_chunks):
+            f.seek(len(header) + (size - len(header)) * i // n_chunks)
+            f.readline()
+            position = f.tell()
+            if starts[-1] < position < size:
+                starts.append(position)
+    return header, list(zip(starts, starts[1:] + [size]))
+
+
+def _read_range(path, start, end):
+    with open(path, "rb") as f:
+        f.seek(start)
+        return f.read(end - start)
+
+
+def _parse_chunk(path, start, end, header, schema, separator, encoding):
+    raw = _read_range(path, start, end)
+    # Drop header lines repeated where yearly files were concatenated
+    header_line = header.rstrip(b"\r\n")
+    if raw.startswith(header_line):
+        raw = raw[len(header) :]
+    raw = raw.replace(b"\n" + header_line + b"\r\n", b"\n").replace(
+        b"\n" + header_line + b"\n", b"\n"
+    )
+    if not raw.strip():
+        return None
+    # Every chunk gets the header back, so short (ragged) rows are padded with
+    # nulls exactly as in a whole-file read
+    raw = header + raw
+    if encoding in ("latin1", "latin-1", "iso-8859-1", "ISO-8859-1"):
+        raw = latin1_to_utf8(raw)
+    elif encoding not in ("utf8", "utf-8"):
+        raw = raw.decode(encoding).encode()
+    return pl.read_csv(io.BytesIO(raw), schema=schema, separator=separator)
+
+
+def read_csv_chunked(path, separator=";", encoding="latin1", schema=None,
+                     n_workers=None, chunk_size=64 * 2**20):
+    """Read ``path`` in parallel byte-range chunks into one DataFrame.
+
+    Without a ``schema``, the first chunk is parsed with inference and its
+    schema is then fixed for all other chunks.
+    """
+    n_workers = n_workers or os.cpu_count()
+    n_chunks = max(n_workers, os.path.getsize(path) // chunk_size + 1)
+    header, ranges = split_byte_ranges(path, n_chunks)
+
+    first = _parse_chunk(path, *ranges[0], header, schema, separator, encoding)
+    if schema is None and first is not None:
+        schema = first.schema
+
+    with ThreadPoolExecutor(n_workers) as pool:
+        rest = pool.map(
+            lambda r: _parse_chunk(path, *r, header, schema, separator, encoding),
+            ranges[1:],
+        )
+        chunks = [c for c in [first, *rest] if c is not None]
+    return pl.concat(chunks, rechunk=False)
+
+
+def benchmark(copies=2_000, source="data/bikes.csv"):
+    """Time the reader on ``copies`` concatenated copies of ``source``."""
+    with open(source, "rb") as f:
+        content = f.read()
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    with os.fdopen(fd, "wb") as f:
+        for _ in range(copies):
+            f.write(content)
+    try:
+        results = {"bytes": os.path.getsize(path)}
+        workers = 1
+        while workers <= os.cpu_count():
+            started = time.perf_counter()
+            df = read_csv_chunked(path, n_workers=workers, chunk_size=2**20)
+            results[f"{workers}_workers_s"] = time.perf_counter() - started
+            workers *= 2
+        results["rows"] = df.height
+        started = time.perf_counter()
+        # The CH1.py approach: decode everything in Python, then parse. All
+        # strings, since the repeated headers would not parse as numbers.
+        with open(path, encoding="ISO-8859-1") as f:
+            pl.read_csv(io.StringIO(f.read()), separator=";", infer_schema_length=0)
+        results["python_decode_s"] = time.perf_counter() - started
+    finally:
+        os.remove(path)
+    return results
+
+
+if __name__ == "__main__":
+    print(read_csv_chunked("data/bikes.csv").head())
+    print(benchmark())
@@ -0,0 +1,146 @@
+"""Weather descriptions as bitmasks of canonical conditions.
+
+The ``weather`` column holds comma-joined condition lists such as
+"Rain,Fog" or "Snow Showers". Chapter 6 answers "is it snowing?" with
+``str.contains("Snow")`` on every row. A year of hourly data has only about
+50 distinct descriptions, so each distinct description is tokenised once
+into a bitmask over ``CONDITIONS``. The masks are mapped back onto the rows
+with a single ``replace_strict``. After that, a question such as "snow and
+fog" is an integer AND per row:
+
+    weather = with_condition_mask(weather_2012)
+    weather.group_by(pl.col("date_time").dt.month()).agg(
+        has_conditions("Snow", "Fog").sum()
+    )
+
+A condition is set when its name appears as words in one of the
+description's tokens. "Blowing Snow" and "Snow Pellets" are Snow,
+"Freezing Drizzle" is Freezing and Drizzle, and "Mainly Clear" is Clear.
+This matches the substring tests of chapter 6. Intensity words ("Moderate",
+"Heavy") are not conditions. Tokens that match no condition set no bits.
+"""
+
+import re
+
+import polars as pl
+
+CONDITIONS = [
+    "Clear",
+    "Cloudy",
+    "Rain",
+    "Drizzle",
+    "Snow",
+    "Ice Pellets",
+    "Fog",
+    "Haze",
+    "Thunderstorms",
+    "Freezing",
+    "Showers",
+    "Blowing",
+]
+
+MASK_DTYPE = pl.UInt16
+
+_PATTERNS = [re.compile(rf"\b{re.escape(name)}\b") for name in CONDITIONS]
+
+
+def condition_bits(*names):
+    """The mask with the bits of ``names`` set."""
+    mask = 0
+    for name in names:
+        mask |= 1 << CONDITIONS.index(name)
+    return mask
+
+
+def tokenise(description):
+    """Bitmask of one description, e.g. "Rain,Fog" -> bits of Rain and Fog."""
+    mask = 0
+    for token in description.split(","):
+        for bit, pattern in enumerate(_PATTERNS):
+            if pattern.search(token):
+                mask |= 1 << bit
+    return mask
+
+
+def description_masks(descriptions):
+    """One row per distinct description with its bitmask."""
+    distinct = pl.Series("description", descriptions, dtype=pl.String).drop_nulls().unique()
+    return pl.DataFrame(
+        {
+            "description": distinct,
+            "mask": pl.Series([tokenise(d) for d in distinct], dtype=MASK_DTYPE),
+        }
+    )
+
+
+def with_condition_mask(frame, column="weather", name="conditions"):
+    """Add a ``name`` bitmask column computed from the descriptions in ``column``.
+
+    Works on a DataFrame or a LazyFrame; for a LazyFrame only the distinct
+    descriptions are collected up front. Null descriptions give a null mask.
+    """
+    if isinstance(frame, pl.LazyFrame):
+        distinct = frame.select(pl.col(column).unique()).collect().to_series()
+    else:
+        distinct = frame[column].unique()
+    masks = description_masks(distinct)
+    return frame.with_columns(
+        pl.col(column)
+        .replace_strict(masks["description"], masks["mask"], return_dtype=MASK_DTYPE)
+        .alias(name)
+    )
+
+
+def has_conditions(*names, column="conditions", how="all"):
+    """Expression: all of ``names`` are set (``how="any"``: at least one is)."""
+    bits = pl.lit(condition_bits(*names), MASK_DTYPE)
+    if how == "any":
+        return (pl.col(column) & bits) != 0
+    return (pl.col(column) & bits) == bits
+
+
+def multi_hot(column="conditions"):
+    """One boolean expression per condition, for a multi-hot matrix:
+
+    weather.select(multi_hot())
+    """
+    return [
+        ((pl.col(column) & pl.lit(1 << bit, MASK_DTYPE)) != 0).alias(name)
+        for bit, name in enumerate(CONDITIONS)
+    ]
+
+
+if __name__ == "__main__":
+    import time
+
+    weather = pl.read_csv("data/weather_2012.csv", try_parse_dates=True)
+    weather = pl.concat([weather] * 50)
+    month = pl.col("date_time").dt.month()
+
+    started = time.perf_counter()
+    expected = (
+        weather.group_by(month)
+        .agg(
+            (
+                pl.col("weather").str.contains("Snow") & pl.col("weather").str.contains("Fog")
+            ).sum()
+        )
+        .sort("date_time")
+    )
+    substring_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    masked = with_condition_mask(weather)
+    tokenise_s = time.perf_counter() - started
+    started = time.perf_counter()
+    actual = (
+        masked.group_by(month)
+        .agg(has_conditions("Snow", "Fog").sum())
+        .sort("date_time")
+    )
+    bitmask_s = time.perf_counter() - started
+
+    assert expected.to_series(1).to_list() == actual.to_series(1).to_list()
+    print(f"{weather.height} rows, snow and fog hours per month")
+    print(f"str.contains: {substring_s:.3f}s")
+    print(f"bitmask: {bitmask_s:.3f}s (+ {tokenise_s:.3f}s to tokenise once)")
@@ -0,0 +1,205 @@
+"""Incremental processing of live 311 service request feeds.
+
+Chapters 2, 3 and 7 work on a static CSV snapshot. Here records arrive as
+newline-delimited CSV (appended to a file, or sent over a socket) and are
+processed in micro-batches: every batch is parsed and counted on its own
+and folded into running counts, so history is never re-read.
+"""
+
+import csv
+import io
+import os
+import socket
+import time
+
+import polars as pl
+
+NOISE_COMPLAINT = "Noise - Street/Sidewalk"
+
+# Placeholders for missing zip codes found in chapter 7
+ZIP_NA_VALUES = ["NO CLUE", "N/A", "0"]
+
+
+def clean_incident_zip(column="Incident Zip"):
+    """Expression applying the chapter 7 zip-code cleaning.
+
+    Placeholders become null, ZIP+4 codes are truncated to five digits and
+    "00000" is treated as missing.
+    """
+    zip_code = pl.col(column)
+    zip_code = pl.when(zip_code.is_in(ZIP_NA_VALUES)).then(None).otherwise(zip_code)
+    zip_code = zip_code.str.slice(0, 5)
+    return pl.when(zip_code == "00000").then(None).otherwise(zip_code).alias(column)
+
+
+def _split_records(data):
+    """Split bytes into complete CSV records and the unterminated remainder.
+
+    A newline inside a quoted field does not end a record (doubled quotes
+    keep the count even), and the "\\r" of CRLF line endings is dropped.
+    """
+    records = []
+    start = position = 0
+    quoted = False
+    while (newline := data.find(b"\n", position)) != -1:
+        quoted ^= data.count(b'"', position, newline) % 2 == 1
+        position = newline + 1
+        if not quoted:
+            records.append(data[start:newline].removesuffix(b"\r"))
+            start = position
+    return records, data[start:]
+
+
+def tail_file(path, batch_size=1_000, poll_interval=0.5, stop_when_idle=False):
+    """Yield lists of complete CSV records appended to ``path``.
+
+    The first yielded batch starts with the header line. Reading resumes from
+    the last offset, so nothing is read twice. A trailing partial record is
+    held back until its newline arrives; with ``stop_when_idle`` it is
+    yielded as the last record once the file stops growing.
+    """
+    offset = 0
+    pending = b""
+    while True:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            chunk = f.read()
+        offset += len(chunk)
+        records, pending = _split_records(pending + chunk)
+        for start in range(0, len(records), batch_size):
+            yield records[start : start + batch_size]
+        if not chunk:
+            if stop_when_idle:
+                if pending.strip():
+                    yield [pending.removesuffix(b"\r")]
+                return
+            time.sleep(poll_interval)
+
+
+def socket_lines(host="127.0.0.1", port=9311, batch_size=1_000):
+    """Yield lists of CSV records received from a local TCP socket.
+
+    A stand-in for a real feed: anything that writes CSV lines to the socket
+    (``nc -l 9311 < 311.csv``) can drive the processor.
+    """
+    with socket.create_connection((host, port)) as conn:
+        pending = b""
+        batch = []
+        while chunk := conn.recv(1 << 16):
+            records, pending = _split_records(pending + chunk)
+            batch.extend(records)
+            while len(batch) >= batch_size:
+                yield batch[:batch_size]
+                batch = batch[batch_size:]
+        if pending.strip():
+            batch.append(pending.removesuffix(b"\r"))
+        if batch:
+            yield batch
+
+
+class ComplaintFeedProcessor:
+    """Running per-borough and per-type counts over a 311 feed.
+
+    Example:
+        processor = ComplaintFeedProcessor()
+        for lines in tail_file("data/311-live.csv", stop_when_idle=True):
+            processor.process_lines(lines)
+        processor.noise_ratio()
+        processor.metrics_frame()
+    """
+
+    def __init__(self, columns=None, complaint_type=NOISE_COMPLAINT):
+        self.columns = columns
+        self.complaint_type = complaint_type
+        self.rows_seen = 0
+        self.borough_counts = pl.DataFrame(
+            schema={"Borough": pl.Utf8, "count": pl.UInt64, "noise_count": pl.UInt64}
+        )
+        self.type_counts = pl.DataFrame(
+            schema={"Complaint Type": pl.Utf8, "count": pl.UInt64}
+        )
+        self.metrics = []
+
+    def process_lines(self, lines):
+        """Parse and fold one batch of raw CSV records. Returns the batch."""
+        started = time.perf_counter()
+        lines = [line for line in lines if line.strip()]
+        if self.columns is None and lines:
+            self.columns = next(csv.reader([lines.pop(0).decode()]))
+        if not lines:
+            return None
+
+        batch = pl.read_csv(
+            io.BytesIO(b"\n".join(lines)),
+            has_header=False,
+            new_columns=self.columns,
+            infer_schema_length=0,
+        )
+        batch = self.process_frame(batch)
+
+        elapsed = time.perf_counter() - started
+        self.metrics.append(
+            {
+                "batch": len(self.metrics),
+                "rows": batch.height,
+                "latency_s": elapsed,
+                "rows_per_s": batch.height / elapsed if elapsed else float("inf"),
+            }
+        )
+        return batch
+
+    def process_frame(self, batch):
+        """Fold an already parsed batch into the running counts."""
+        borough_counts = batch.group_by("Borough").agg(
+            count=pl.len().cast(pl.UInt64),
+            noise_count=(pl.col("Complaint Type") == self.complaint_type)
+            .sum()
+            .cast(pl.UInt64),
+        )
+        type_counts = batch.group_by("Complaint Type").agg(
+            count=pl.len().cast(pl.UInt64)
+        )
+        self.borough_counts = (
+            pl.concat([self.borough_counts, borough_counts])
+            .group_by("Borough")
+            .agg(pl.col("count").sum(), pl.col("noise_count").sum())
+        )
+        self.type_counts = (
+            pl.concat([self.type_counts, type_counts])
+            .group_by("Complaint Type")
+            .agg(pl.col("count").sum())
+        )
+        self.rows_seen += batch.height
+        return batch
+
+    def noise_ratio(self):
+        """Fraction of complaints per borough that are noise complaints."""
+        return (
+            self.borough_counts.with_columns(
+                count_ratio=pl.col("noise_count") / pl.col("count")
+            )
+            .select(["Borough", "count_ratio"])
+            .sort("Borough")
+        )
+
+    def top_complaint_types(self, n=10):
+        return self.type_counts.sort("count", descending=True).head(n)
+
+    def metrics_frame(self):
+        return pl.DataFrame(self.metrics)
+
+
+def process_feed(batches, processor=None):
+    """Drive a processor over an iterable of line batches."""
+    processor = processor or ComplaintFeedProcessor()
+    for lines in batches:
+        processor.process_lines(lines)
+    return processor
+
+
+if __name__ == "__main__":
+    path = os.environ.get("FEED_311", "data/311-service-requests.csv")
+    result = process_feed(tail_file(path, stop_when_idle=True))
+    print(result.top_complaint_types())
+    print(result.noise_ratio())
+    print(result.metrics_frame().describe())
@@ -0,0 +1,161 @@
+"""One-pass column profiling for DataFrames and LazyFrames.
+
+``profile_frame`` builds one expression per statistic and column and runs
+them all in a single ``select``, which Polars evaluates in parallel. It
+replaces the per-column Python loops of chapter 5 (null and empty-string
+checks) and chapter 7 (``unique()``, ``str.len() > 5``).
+"""
+
+import polars as pl
+
+# Upper edges of the string length histogram buckets; the last is open-ended
+LENGTH_BUCKETS = [0, 5, 10, 20, 50]
+
+_INTEGER_TYPES = [
+    pl.UInt8, pl.UInt16, pl.UInt32, pl.UInt64,
+    pl.Int8, pl.Int16, pl.Int32, pl.Int64,
+]
+_INTEGER_RANGES = {
+    pl.UInt8: (0, 2**8 - 1),
+    pl.UInt16: (0, 2**16 - 1),
+    pl.UInt32: (0, 2**32 - 1),
+    pl.UInt64: (0, 2**64 - 1),
+    pl.Int8: (-(2**7), 2**7 - 1),
+    pl.Int16: (-(2**15), 2**15 - 1),
+    pl.Int32: (-(2**31), 2**31 - 1),
+    pl.Int64: (-(2**63), 2**63 - 1),
+}
+
+
+def narrowest_integer_dtype(minimum, maximum):
+    """Smallest integer dtype holding ``[minimum, maximum]``, unsigned first."""
+    for dtype in _INTEGER_TYPES:
+        low, high = _INTEGER_RANGES[dtype]
+        if low <= minimum and maximum <= high:
+            return dtype
+    return pl.Float64
+
+
+def _key(column, stat):
+    return f"{column}\x00{stat}"
+
+
+def _length_bucket_names():
+    names = []
+    low = 0
+    for high in LENGTH_BUCKETS:
+        names.append(f"len_{low}" if low == high else f"len_{low}_{high}")
+        low = high + 1
+    names.append(f"len_{low}_plus")
+    return names
+
+
+def _column_exprs(name, dtype):
+    col = pl.col(name)
+    exprs = [
+        col.null_count().alias(_key(name, "nulls")),
+        col.approx_n_unique().alias(_key(name, "distinct_estimate")),
+    ]
+    if dtype == pl.String:
+        length = col.str.len_chars()
+        as_int = col.str.strip_chars().cast(pl.Int64, strict=False)
+        as_float = col.str.strip_chars().cast(pl.Float64, strict=False)
+        as_date = col.str.to_date(strict=False)
+        as_datetime = col.str.to_datetime(strict=False)
+        non_empty = col.is_not_null() & (col != "")
+        exprs += [
+            (col == "").sum().alias(_key(name, "empty_strings")),
+            col.min().alias(_key(name, "min")),
+            col.max().alias(_key(name, "max")),
+            non_empty.sum().alias(_key(name, "non_empty")),
+            as_int.is_not_null().sum().alias(_key(name, "int_parsed")),
+            as_int.min().alias(_key(name, "int_min")),
+            as_int.max().alias(_key(name, "int_max")),
+            as_float.is_not_null().sum().alias(_key(name, "float_parsed")),
+            as_date.is_not_null().sum().alias(_key(name, "date_parsed")),
+            as_datetime.is_not_null().sum().alias(_key(name, "datetime_parsed")),
+        ]
+        low = 0
+        for high, bucket in zip(LENGTH_BUCKETS, _length_bucket_names()):
+            exprs.append(length.is_between(low, high).sum().alias(_key(name, bucket)))
+            low = high + 1
+        exprs.append(
+            (length >= low).sum().alias(_key(name, _length_bucket_names()[-1]))
+        )
+    elif dtype.is_numeric() or dtype.is_temporal():
+        exprs += [col.min().alias(_key(name, "min")), col.max().alias(_key(name, "max"))]
+    return exprs
+
+
+def _suggest_dtype(dtype, stats, rows):
+    if dtype.is_integer() and stats["min"] is not None:
+        return narrowest_integer_dtype(stats["min"], stats["max"])
+    if dtype != pl.String:
+        return dtype
+    non_empty = stats["non_empty"]
+    if non_empty == 0:
+        return pl.String
+    if stats["int_parsed"] == non_empty:
+        return narrowest_integer_dtype(stats["int_min"], stats["int_max"])
+    if stats["float_parsed"] == non_empty:
+        return pl.Float64
+    if stats["date_parsed"] == non_empty:
+        return pl.Date
+    if stats["datetime_parsed"] == non_empty:
+        return pl.Datetime
+    if rows and stats["distinct_estimate"] <= max(rows // 2, 1):
+        return pl.Categorical
+    return pl.String
+
+
+def profile_frame(frame, sample_rows=None, streaming=False):
+    """Per-column statistics of a DataFrame or LazyFrame, one row per column.
+
+    Columns: dtype, nulls, empty_strings, distinct_estimate (HyperLogLog),
+    min, max, string length histogram counts and suggested_dtype.
+
+    ``sample_rows`` profiles a random sample of a DataFrame, or the first rows
+    of a LazyFrame. ``streaming`` collects LazyFrames with the streaming
+    engine so that files larger than memory can be scanned
+    (``profile_frame(pl.scan_csv(path), streaming=True)``).
+    """
+    lf = frame.lazy()
+    if sample_rows is not None:
+        if isinstance(frame, pl.DataFrame):
+            lf = frame.sample(min(sample_rows, frame.height), seed=0).lazy()
+        else:
+            lf = lf.head(sample_rows)
+    schema = lf.collect_schema()
+
+    exprs = [pl.len().alias("\x00rows")]
+    for name, dtype in schema.items():
+        exprs += _column_exprs(name, dtype)
+    selected = lf.select(exprs)
+    row = (
+        selected.collect(engine="streaming") if streaming else selected.collect()
+    ).row(0, named=True)
+
+    rows = row.pop("\x00rows")
+    records = []
+    for name, dtype in schema.items():
+        stats = {
+            key.split("\x00", 1)[1]: value
+            for key, value in row.items()
+            if key.split("\x00", 1)[0] == name
+        }
+        record = {
+            "column": name,
+            "dtype": str(dtype),
+            "rows": rows,
+            "nulls": stats["nulls"],
+            "empty_strings": stats.get("empty_strings", 0),
+            # HyperLogLog can overshoot slightly on near-unique columns
+            "distinct_estimate": min(stats["distinct_estimate"], rows),
+            "min": None if stats.get("min") is None else str(stats["min"]),
+            "max": None if stats.get("max") is None else str(stats["max"]),
+            "suggested_dtype": str(_suggest_dtype(dtype, stats, rows)),
+        }
+        for bucket in _length_bucket_names():
+            record[bucket] = stats.get(bucket)
+        records.append(record)
+    return pl.DataFrame(records, infer_schema_length=None)
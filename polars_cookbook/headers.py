@@ -0,0 +1,136 @@
+"""Encoding detection and header normalisation for the weather CSV exports.
+
+The climate.weather.gc.ca files are UTF-8 with a byte order mark. Decoding
+them as latin-1 turns the BOM into ``ï»¿`` and every ``°`` into ``Â°``, which
+chapter 5 then strips with string replaces and two rename passes. Here the
+encoding is detected from the first bytes, the data is decoded once, and the
+header names are mapped straight to their canonical snake_case form when
+the CSV is read.
+"""
+
+import codecs
+import csv
+import io
+import re
+import unicodedata
+
+import polars as pl
+
+_BOMS = [
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+]
+
+# Raw header (English and French exports, old and new layouts) -> canonical name
+CANONICAL_HEADERS = {
+    "Longitude (x)": "longitude",
+    "Latitude (y)": "latitude",
+    "Station Name": "station_name",
+    "Nom de la Station": "station_name",
+    "Climate ID": "climate_id",
+    "ID climatologique": "climate_id",
+    "Date/Time": "date_time_lst",
+    "Date/Time (LST)": "date_time_lst",
+    "Date/Heure": "date_time_lst",
+    "Date/Heure (HNL)": "date_time_lst",
+    "Year": "year",
+    "Année": "year",
+    "Month": "month",
+    "Mois": "month",
+    "Day": "day",
+    "Jour": "day",
+    "Time": "time_lst",
+    "Time (LST)": "time_lst",
+    "Heure": "time_lst",
+    "Heure (HNL)": "time_lst",
+    "Temp (°C)": "temperature_c",
+    "Temp Flag": "temperature_flag",
+    "Temp Indicateur": "temperature_flag",
+    "Dew Point Temp (°C)": "dew_point_temp_c",
+    "Dew Point Temp Flag": "dew_point_temp_flag",
+    "Point de rosée (°C)": "dew_point_temp_c",
+    "Point de rosée Indicateur": "dew_point_temp_flag",
+    "Rel Hum (%)": "relative_humidity",
+    "Rel Hum Flag": "relative_humidity_flag",
+    "Hum. rel (%)": "relative_humidity",
+    "Hum. rel. Indicateur": "relative_humidity_flag",
+    "Precip. Amount (mm)": "precip_amount_mm",
+    "Precip. Amount Flag": "precip_amount_flag",
+    "Wind Dir (10s deg)": "wind_dir_10s_deg",
+    "Wind Dir Flag": "wind_dir_flag",
+    "Dir. du vent (10s deg)": "wind_dir_10s_deg",
+    "Dir. du vent Indicateur": "wind_dir_flag",
+    "Wind Spd (km/h)": "wind_speed_kmh",
+    "Wind Spd Flag": "wind_speed_flag",
+    "Vit. du vent (km/h)": "wind_speed_kmh",
+    "Vit. du vent Indicateur": "wind_speed_flag",
+    "Visibility (km)": "visibility_km",
+    "Visibility Flag": "visibility_flag",
+    "Visibilité (km)": "visibility_km",
+    "Visibilité Indicateur": "visibility_flag",
+    "Stn Press (kPa)": "station_pressure_kpa",
+    "Stn Press Flag": "station_pressure_flag",
+    "Pression à la station (kPa)": "station_pressure_kpa",
+    "Pression à la station Indicateur": "station_pressure_flag",
+    "Hmdx": "humidex",
+    "Hmdx Flag": "humidex_flag",
+    "Hmdx Indicateur": "humidex_flag",
+    "Wind Chill": "wind_chill",
+    "Wind Chill Flag": "wind_chill_flag",
+    "Refroid. éolien": "wind_chill",
+    "Refroid. éolien Indicateur": "wind_chill_flag",
+    "Weather": "weather",
+    "Temps": "weather",
+}
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def detect_encoding(raw, sample_size=64 * 1024):
+    """Guess the encoding of ``raw`` bytes from a BOM or a UTF-8 trial decode."""
+    for bom, encoding in _BOMS:
+        if raw.startswith(bom):
+            return encoding
+    sample = raw[:sample_size]
+    try:
+        # A multi-byte character may be cut at the end of the sample
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+    except UnicodeDecodeError:
+        return "latin-1"
+    return "utf-8"
+
+
+def to_utf8(raw, encoding=None):
+    """Return ``raw`` as UTF-8 bytes, transcoding if needed.
+
+    UTF-8 input is returned as is, BOM included: Polars skips the BOM itself,
+    and slicing it off here would copy the whole buffer.
+    """
+    encoding = encoding or detect_encoding(raw)
+    if encoding == "utf-8":
+        return raw
+    data = raw.decode(encoding)
+    return data.lstrip("\ufeff").encode()
+
+
+def snake_case(name):
+    """Fallback for headers not in the table: "Rel Hum (%)" -> "rel_hum"."""
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    return _NON_ALNUM.sub("_", ascii_name.lower()).strip("_")
+
+
+def canonical_headers(names):
+    return [CANONICAL_HEADERS.get(name) or snake_case(name) for name in names]
+
+
+def read_weather_csv(raw, encoding=None, **kwargs):
+    """Read a weather export from bytes with canonical column names.
+
+    Extra keyword arguments are passed to ``pl.read_csv``.
+    """
+    data = to_utf8(raw, encoding)
+    end = data.find(b"\n")
+    header_line = data[: end if end >= 0 else len(data)].decode("utf-8-sig").rstrip("\r")
+    header = next(csv.reader([header_line]))
+    return pl.read_csv(io.BytesIO(data), new_columns=canonical_headers(header), **kwargs)
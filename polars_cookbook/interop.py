@@ -0,0 +1,113 @@
+"""Moving frames between Polars and pandas through Arrow buffers.
+
+Some chapters still need pandas, for ``.plot()`` or ``resample()``. The
+default ``DataFrame.to_pandas()`` converts every column to NumPy (and every
+string column to Python objects). With ``use_pyarrow_extension_array=True``
+the pandas columns are backed by the same Arrow buffers instead. Either way
+the index semantics of the original chapters are kept: ``index_col="Date"``
+becomes a ``DatetimeIndex`` going to pandas, and a sorted Date column coming
+back.
+
+pandas and pyarrow are imported only when a conversion is made.
+
+Run ``python -m polars_cookbook.interop`` for a round-trip benchmark on the
+weather frame and a synthetic 311 frame.
+"""
+
+import time
+
+import numpy as np
+import polars as pl
+
+_INDEX_ATTR = "polars_index"
+
+
+def to_pandas(df, index=None, zero_copy=False):
+    """Convert to pandas, optionally with ``index`` as a DatetimeIndex.
+
+    By default the columns are converted to NumPy as ``df.to_pandas()`` does.
+    ``zero_copy=True`` backs them with Arrow extension arrays instead. That
+    needs pyarrow and pandas >= 1.5, newer than the pandas 1.4 pinned in
+    environment.yml.
+    """
+    import pandas as pd
+
+    columns = df.drop(index) if index is not None else df
+    pdf = columns.to_pandas(use_pyarrow_extension_array=zero_copy)
+    if index is not None:
+        values = df[index]
+        # Date is datetime64[D] in NumPy, which a DatetimeIndex cannot hold
+        array = values.to_numpy()
+        if values.dtype == pl.Date:
+            array = array.astype("datetime64[s]")
+        pdf.index = pd.DatetimeIndex(array, name=index)
+        pdf.attrs[_INDEX_ATTR] = {"name": index, "dtype": str(values.dtype)}
+    return pdf
+
+
+def from_pandas(pdf, index_dtype=None):
+    """Convert to Polars, turning a named index back into a sorted column.
+
+    The index dtype recorded by ``to_pandas`` (e.g. Date) is restored, or
+    ``index_dtype`` is used when given.
+    """
+    has_index = pdf.index.name is not None
+    df = pl.from_pandas(pdf, include_index=has_index)
+    if not has_index:
+        return df
+    name = pdf.index.name
+    recorded = pdf.attrs.get(_INDEX_ATTR, {})
+    if index_dtype is None and recorded.get("name") == name and recorded.get("dtype") == "Date":
+        index_dtype = pl.Date
+    if index_dtype is not None:
+        df = df.with_columns(pl.col(name).cast(index_dtype))
+    if not df[name].is_sorted():
+        df = df.sort(name)
+    return df.with_columns(pl.col(name).set_sorted())
+
+
+def _synthetic_311(rows=1_000_000, seed=0):
+    rng = np.random.default_rng(seed)
+    types = ["Noise - Street/Sidewalk", "HEATING", "Street Condition", "Blocked Driveway"]
+    boroughs = ["BROOKLYN", "QUEENS", "MANHATTAN", "BRONX", "STATEN ISLAND"]
+    return pl.DataFrame(
+        {
+            "Unique Key": np.arange(rows),
+            "Complaint Type": rng.choice(types, rows),
+            "Borough": rng.choice(boroughs, rows),
+            "Incident Zip": rng.integers(10000, 11500, rows).astype(str),
+        }
+    )
+
+
+def benchmark(repeat=3):
+    """Round-trip time of both conversion modes on the weather and 311 frames."""
+    import pandas as pd
+
+    weather = pl.read_csv("data/weather_2012.csv", try_parse_dates=True)
+    frames = {"weather_2012": (weather, "date_time"), "synthetic_311": (_synthetic_311(), None)}
+    # ArrowDtype appeared in pandas 1.5
+    major, minor = (int(part) for part in pd.__version__.split(".")[:2])
+    modes = (False, True) if (major, minor) >= (1, 5) else (False,)
+    rows = []
+    for name, (df, index) in frames.items():
+        for zero_copy in modes:
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                back = from_pandas(to_pandas(df, index=index, zero_copy=zero_copy))
+                timings.append(time.perf_counter() - started)
+            rows.append(
+                {
+                    "frame": name,
+                    "arrow": zero_copy,
+                    "rows": df.height,
+                    "best_s": min(timings),
+                    "same": back.equals(df.select(back.columns)),
+                }
+            )
+    return pl.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    print(benchmark())
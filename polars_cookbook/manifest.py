@@ -0,0 +1,435 @@
+"""Fingerprints of the data files, and a make-style DAG that skips unchanged steps.
+
+CH5.py cannot tell whether the upstream monthly CSVs or the local
+``weather_2012.csv``/``bikes.csv`` changed since the last run, so it redoes
+everything. ``Manifest`` keeps a JSON record for each file: size, mtime, a
+content hash, per-chunk hashes, row count and schema. ``Pipeline`` runs the
+steps in dependency order. A step whose inputs, parameters and outputs
+still match the manifest is skipped. A step can also ask for its inputs to
+be fingerprinted per partition (e.g. per month), and is then told which
+partitions changed since its last run.
+
+Unlike make, the decision is made on content, not mtime. A re-downloaded
+month with identical bytes does not trigger the steps downstream of it. The
+mtime and size are only a shortcut: a file whose stat matches the manifest
+is not read again.
+
+Hashes are xxh3-128 from ``xxhash`` (in environment.yml). Without it they
+fall back to blake2b from hashlib. The manifest stores which algorithm it
+used and starts over when that changes.
+"""
+
+import graphlib
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import polars as pl
+
+from polars_cookbook.memo import stable_fingerprint
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+HASH_ALGORITHM = "xxh3_128" if xxhash is not None else "blake2b"
+
+CHUNK_SIZE = 4 << 20
+
+# Suffix -> LazyFrame reader used for row counts and schemas
+READERS = {
+    ".parquet": pl.scan_parquet,
+    ".arrow": pl.scan_ipc,
+    ".ipc": pl.scan_ipc,
+}
+
+# The chapters' local inputs, which need reader options
+CHAPTER_READERS = {
+    "data/weather_2012.csv": lambda path: pl.scan_csv(path, try_parse_dates=True),
+    # scan_csv only decodes UTF-8, so read latin-1 eagerly like the chapters do
+    "data/bikes.csv": lambda path: pl.read_csv(path, separator=";", encoding="latin1").lazy(),
+}
+
+
+def _new_hash():
+    if xxhash is not None:
+        return xxhash.xxh3_128()
+    return hashlib.blake2b(digest_size=16)
+
+
+def hash_file(path, chunk_size=CHUNK_SIZE):
+    """Content hash of ``path`` and the hash of each ``chunk_size`` block."""
+    whole = _new_hash()
+    chunks = []
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            whole.update(chunk)
+            block = _new_hash()
+            block.update(chunk)
+            chunks.append(block.hexdigest())
+    return whole.hexdigest(), chunks
+
+
+def frame_schema(frame):
+    schema = frame.collect_schema() if isinstance(frame, pl.LazyFrame) else frame.schema
+    return {name: str(dtype) for name, dtype in schema.items()}
+
+
+def partition_fingerprints(df, by):
+    """Row count and content hash of every partition of ``df`` by ``by``.
+
+    The hash is ``stable_fingerprint``, so the manifest's partition records
+    still match after a Polars upgrade.
+
+    Example: ``partition_fingerprints(weather, pl.col("date_time").dt.month())``.
+    """
+    by = pl.col(by) if isinstance(by, str) else by
+    keyed = df.with_columns(by.alias("_partition"))
+    return {
+        str(key): {"rows": part.height, "hash": stable_fingerprint(part.drop("_partition"))}
+        for (key,), part in keyed.partition_by(
+            "_partition", as_dict=True, maintain_order=True
+        ).items()
+    }
+
+
+class Manifest:
+    """Fingerprints of files, and the state of every pipeline stage, in a JSON file.
+
+    ``readers`` maps paths to a function returning a LazyFrame for the file.
+    It is needed for row counts and schemas of files that ``READERS`` cannot
+    read by suffix alone, such as the ";"-separated latin-1 ``bikes.csv``.
+    """
+
+    def __init__(self, path, readers=None, chunk_size=CHUNK_SIZE):
+        self.path = Path(path)
+        self.readers = {str(p): reader for p, reader in (readers or {}).items()}
+        self.chunk_size = chunk_size
+        self.data = {"algorithm": HASH_ALGORITHM, "files": {}, "stages": {}}
+        if self.path.exists():
+            data = json.loads(self.path.read_text())
+            # Hashes from another algorithm cannot be compared; start over
+            if data.get("algorithm") == HASH_ALGORITHM:
+                self.data = data
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.data, indent=1, sort_keys=True))
+        os.replace(tmp, self.path)
+
+    def _reader(self, path):
+        return self.readers.get(str(path)) or READERS.get(Path(path).suffix)
+
+    def file(self, path):
+        """The fingerprint record of ``path``, re-hashed only if its stat changed.
+
+        Returns None for a missing file.
+        """
+        path = str(path)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        record = self.data["files"].get(path)
+        if record and record["size"] == stat.st_size and record["mtime_ns"] == stat.st_mtime_ns:
+            return record
+
+        digest, chunks = hash_file(path, self.chunk_size)
+        if record and record["hash"] == digest:
+            # Touched or rewritten with the same bytes
+            record.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            return record
+        record = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": digest,
+                  "chunks": chunks, "rows": None, "schema": None}
+        reader = self._reader(path)
+        if reader is not None:
+            lf = reader(path)
+            record["schema"] = frame_schema(lf)
+            record["rows"] = lf.select(pl.len()).collect().item()
+        self.data["files"][path] = record
+        return record
+
+    def changed_chunks(self, path):
+        """Indices of the chunks of ``path`` that differ from the manifest."""
+        old = self.data["files"].get(str(path), {}).get("chunks", [])
+        _, new = hash_file(path, self.chunk_size)
+        return [i for i in range(max(len(old), len(new)))
+                if i >= len(old) or i >= len(new) or old[i] != new[i]]
+
+    def files_frame(self):
+        return pl.DataFrame(
+            [
+                {"path": path, "size": r["size"], "rows": r["rows"], "hash": r["hash"],
+                 "chunks": len(r["chunks"])}
+                for path, r in sorted(self.data["files"].items())
+            ],
+            schema={"path": pl.String, "size": pl.Int64, "rows": pl.Int64,
+                    "hash": pl.String, "chunks": pl.Int64},
+        )
+
+
+class Stage:
+    def __init__(self, name, func, inputs, outputs, params, always, partitions):
+        self.name = name
+        self.func = func
+        self.inputs = [str(p) for p in inputs]
+        self.outputs = [str(p) for p in outputs]
+        self.params = params
+        self.always = always
+        self.partitions = {str(p): by for p, by in (partitions or {}).items()}
+        unknown = set(self.partitions) - set(self.inputs)
+        if unknown:
+            raise ValueError(f"partitioned paths {sorted(unknown)} are not inputs of {name!r}")
+
+
+class Pipeline:
+    """Named steps with file inputs and outputs, run like a minimal make.
+
+    Example:
+        pipeline = Pipeline(Manifest("data/manifest.json"))
+
+        @pipeline.stage("clean", inputs=["data/weather_2012.csv"],
+                        outputs=["data/weather_2012.parquet"])
+        def clean():
+            pl.read_csv("data/weather_2012.csv").write_parquet("data/weather_2012.parquet")
+
+        pipeline.run()
+
+    A stage depends on the stages that produce its inputs. It reruns when an
+    output is missing, an input or output hash differs from the one recorded
+    after its last run, or ``params`` (anything JSON-serialisable, e.g. the
+    year and station) changed. ``always=True`` marks steps such as downloads
+    that must run every time; their consumers still skip when the
+    downloaded bytes are unchanged.
+
+    ``partitions`` maps some of the inputs to a partitioning expression,
+    e.g. ``{"data/weather_2012.csv": pl.col("date_time").dt.month()}``.
+    Such a stage is called with a dict of input path to the keys (as
+    strings) of the partitions whose rows changed since its last run. When
+    the stage reruns for any reason other than a changed input, every key
+    is passed.
+    """
+
+    def __init__(self, manifest):
+        self.manifest = manifest
+        self.stages = {}
+
+    def add(self, name, func, inputs=(), outputs=(), params=None, always=False,
+            partitions=None):
+        if name in self.stages:
+            raise ValueError(f"stage {name!r} already exists")
+        self.stages[name] = Stage(name, func, inputs, outputs, params, always, partitions)
+        return func
+
+    def stage(self, name, inputs=(), outputs=(), params=None, always=False, partitions=None):
+        return lambda func: self.add(name, func, inputs, outputs, params, always, partitions)
+
+    def _graph(self):
+        producers = {}
+        for stage in self.stages.values():
+            for output in stage.outputs:
+                if output in producers:
+                    raise ValueError(
+                        f"{output} is produced by both {producers[output]!r} and {stage.name!r}"
+                    )
+                producers[output] = stage.name
+        return {
+            stage.name: {producers[p] for p in stage.inputs if p in producers}
+            for stage in self.stages.values()
+        }
+
+    def _hashes(self, paths):
+        hashes = {}
+        for path in paths:
+            record = self.manifest.file(path)
+            hashes[path] = record["hash"] if record else None
+        return hashes
+
+    def _partitions(self, stage):
+        fingerprints = {}
+        for path, by in stage.partitions.items():
+            reader = self.manifest._reader(path)
+            if reader is None:
+                raise ValueError(f"no reader for partitioned input {path}; pass one to Manifest")
+            parts = partition_fingerprints(reader(path).collect(), by)
+            fingerprints[path] = {key: part["hash"] for key, part in parts.items()}
+        return fingerprints
+
+    def _call(self, stage, previous, reason):
+        """Run ``stage``; returns the partition fingerprints to record."""
+        if not stage.partitions:
+            stage.func()
+            return {}
+        fingerprints = self._partitions(stage)
+        old = {}
+        if previous is not None and reason in {f"{p} changed" for p in stage.inputs}:
+            old = previous.get("partitions", {})
+        stage.func({
+            path: [key for key, digest in parts.items() if old.get(path, {}).get(key) != digest]
+            for path, parts in fingerprints.items()
+        })
+        return fingerprints
+
+    def _reason(self, stage, previous):
+        if stage.always:
+            return "always"
+        if previous is None:
+            return "never run"
+        if json.dumps(stage.params, sort_keys=True, default=str) != previous["params"]:
+            return "params changed"
+        for path, digest in self._hashes(stage.inputs).items():
+            if digest is None:
+                raise FileNotFoundError(f"input {path} of stage {stage.name!r} is missing")
+            if previous["inputs"].get(path) != digest:
+                return f"{path} changed"
+        for path, digest in self._hashes(stage.outputs).items():
+            if digest is None:
+                return f"{path} missing"
+            if previous["outputs"].get(path) != digest:
+                return f"{path} modified"
+        return None
+
+    def run(self, targets=None, force=False):
+        """Run out-of-date stages (only those ``targets`` need, if given).
+
+        Returns one row per stage considered: whether it ran, why, and how
+        long it took.
+        """
+        graph = self._graph()
+        wanted = None
+        if targets is not None:
+            wanted, pending = set(), list(targets)
+            while pending:
+                name = pending.pop()
+                if name not in wanted:
+                    wanted.add(name)
+                    pending.extend(graph[name])
+
+        rows = []
+        for name in graphlib.TopologicalSorter(graph).static_order():
+            if wanted is not None and name not in wanted:
+                continue
+            stage = self.stages[name]
+            previous = self.manifest.data["stages"].get(name)
+            reason = "forced" if force else self._reason(stage, previous)
+            seconds = 0.0
+            if reason is not None:
+                started = time.perf_counter()
+                partitions = self._call(stage, previous, reason)
+                seconds = time.perf_counter() - started
+                self.manifest.data["stages"][name] = {
+                    "params": json.dumps(stage.params, sort_keys=True, default=str),
+                    "inputs": self._hashes(stage.inputs),
+                    "outputs": self._hashes(stage.outputs),
+                    "partitions": partitions,
+                }
+                # Saved after every stage, so an interrupted run resumes
+                self.manifest.save()
+            rows.append({"stage": name, "ran": reason is not None,
+                         "reason": reason or "up to date", "seconds": seconds})
+        return pl.DataFrame(
+            rows,
+            schema={"stage": pl.String, "ran": pl.Boolean, "reason": pl.String,
+                    "seconds": pl.Float64},
+        )
+
+
+def weather_pipeline(manifest, out_dir, base_url, year=2012):
+    """CH5.py's steps as a DAG: fetch and clean each month, combine, summarise."""
+    from polars_cookbook.weather_pipeline import clean_month, fetch_month, parse_month
+
+    out_dir = Path(out_dir)
+    pipeline = Pipeline(manifest)
+    cleaned = []
+    for month in range(1, 13):
+        raw = out_dir / "raw" / f"weather_{year}_{month:02d}.csv"
+        clean = out_dir / "clean" / f"weather_{year}_{month:02d}.parquet"
+        cleaned.append(clean)
+
+        def fetch(month=month, raw=raw):
+            body = fetch_month(year, month, base_url=base_url)
+            raw.parent.mkdir(parents=True, exist_ok=True)
+            # Leave identical bytes alone so the stat shortcut still applies
+            if not raw.exists() or raw.read_bytes() != body:
+                raw.write_bytes(body)
+
+        def clean_step(raw=raw, clean=clean):
+            clean.parent.mkdir(parents=True, exist_ok=True)
+            clean_month(parse_month(raw.read_bytes())).write_parquet(clean)
+
+        pipeline.add(f"fetch {month:02d}", fetch, outputs=[raw], always=True,
+                     params={"year": year, "month": month})
+        pipeline.add(f"clean {month:02d}", clean_step, inputs=[raw], outputs=[clean])
+
+    combined = out_dir / f"weather_{year}.parquet"
+    summary = out_dir / f"weather_{year}_monthly.parquet"
+    pipeline.add(
+        "combine",
+        lambda: pl.scan_parquet(cleaned).sink_parquet(combined),
+        inputs=cleaned,
+        outputs=[combined],
+    )
+    pipeline.add(
+        "monthly summary",
+        lambda: pl.scan_parquet(combined)
+        .group_by(pl.col("date_time_lst").dt.month().alias("month"))
+        .agg(pl.col("temperature_c").median(), pl.len().alias("hours"))
+        .sort("month")
+        .sink_parquet(summary),
+        inputs=[combined],
+        outputs=[summary],
+    )
+    return pipeline
+
+
+if __name__ == "__main__":
+    import tempfile
+    from datetime import datetime
+
+    from polars_cookbook.weather_pipeline import mock_weather_server
+
+    with mock_weather_server(latency=0.05) as base_url, tempfile.TemporaryDirectory() as out:
+        manifest_path = Path(out) / "manifest.json"
+
+        manifest = Manifest(manifest_path, readers=CHAPTER_READERS)
+        for path in CHAPTER_READERS:
+            record = manifest.file(path)
+            print(f"{path}: {record['rows']} rows, {len(record['schema'])} columns")
+        manifest.save()
+
+        # Per-month fingerprints: after one corrected reading only March is redone
+        weather_csv = Path(out) / "weather_2012.csv"
+        weather = pl.read_csv("data/weather_2012.csv", try_parse_dates=True)
+        weather.write_csv(weather_csv)
+        readers = {weather_csv: CHAPTER_READERS["data/weather_2012.csv"]}
+        monthly = Pipeline(Manifest(Path(out) / "monthly.json", readers=readers))
+
+        @monthly.stage("monthly medians", inputs=[weather_csv],
+                       partitions={weather_csv: pl.col("date_time").dt.month()})
+        def monthly_medians(changed):
+            print(f"months redone: {changed[str(weather_csv)]}")
+
+        monthly.run()
+        weather.with_columns(
+            pl.when(pl.col("date_time") == datetime(2012, 3, 5, 12))
+            .then(pl.col("temperature_c") + 0.1)
+            .otherwise(pl.col("temperature_c"))
+        ).write_csv(weather_csv)
+        monthly.run()
+
+        def run(label):
+            pipeline = weather_pipeline(Manifest(manifest_path), out, base_url)
+            started = time.perf_counter()
+            report = pipeline.run()
+            ran = report.filter("ran")["stage"].to_list()
+            print(f"{label}: {time.perf_counter() - started:.2f}s, ran {len(ran)}: {ran}")
+
+        run("first run")
+        run("second run, upstream unchanged")
+        os.remove(Path(out) / "clean" / "weather_2012_03.parquet")
+        run("after deleting March's cleaned file")
+        print(Manifest(manifest_path).files_frame())
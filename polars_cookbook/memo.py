@@ -0,0 +1,169 @@
+"""Memoisation of repeated Polars queries.
+
+A query is a function that takes a LazyFrame and returns a LazyFrame, e.g.
+
+    top10 = lambda lf: lf.select(pl.col("Complaint Type").value_counts(sort=True)).head(10)
+
+Its cache key is the fingerprint of the input data plus the serialised plan.
+The plan is built on an empty frame with the same schema, so the key does not
+embed the data itself.
+
+``frame_fingerprint`` is built on ``DataFrame.hash_rows``, which is fast but
+may change between Polars versions: use it for keys that live in one
+process. ``stable_fingerprint`` hashes the column values themselves and is
+the one to store on disk.
+"""
+
+import hashlib
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+
+import polars as pl
+
+
+def frame_fingerprint(df):
+    """Content hash of a DataFrame (schema and row hashes, in order).
+
+    Not stable across Polars versions; see ``stable_fingerprint``.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(df.schema).encode())
+    h.update(df.hash_rows(seed=0).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _update_with_column(h, series):
+    # Type tags avoid str(dtype), whose spelling has changed between versions
+    h.update(series.is_null().to_numpy().tobytes())
+    dtype = series.dtype
+    # Decimals and 128-bit integers have no NumPy dtype; hash their text
+    if dtype in (pl.String, pl.Categorical, pl.Int128) or isinstance(dtype, (pl.Enum, pl.Decimal)):
+        strings = series.cast(pl.String).fill_null("")
+        h.update(b"text")
+        # Lengths keep ["ab", "c"] apart from ["a", "bc"]
+        h.update(strings.str.len_bytes().to_numpy().tobytes())
+        h.update(strings.str.join("").item().encode())
+    elif dtype.is_numeric() or dtype.is_temporal() or dtype == pl.Boolean:
+        values = series.to_physical().fill_null(0).to_numpy()
+        h.update(f"{type(dtype).__name__}:{values.dtype.str}".encode())
+        h.update(values.tobytes())
+    else:
+        # Nested and other types: their JSON form, slower and only as stable as that
+        h.update(b"json")
+        h.update(series.to_frame().write_json().encode())
+
+
+def stable_fingerprint(df):
+    """Content hash of a DataFrame that does not depend on the Polars version.
+
+    blake2b over the column names and, per column, the null mask and the
+    values (physical numbers, or UTF-8 bytes with their lengths). Use it for
+    fingerprints that are persisted, such as the manifest's partition hashes.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(df.height).encode())
+    for name in df.columns:
+        h.update(name.encode() + b"\0")
+        _update_with_column(h, df[name])
+    return h.hexdigest()
+
+
+class QueryCache:
+    """Bounded LRU of query results, optionally spilled to disk as IPC files.
+
+    Example:
+        cache = QueryCache(maxsize=64, spill_dir=".query_cache")
+        counts = cache.collect(pl_complaints, top10)
+
+    The fingerprint of each frame is computed once and remembered for as
+    long as the frame is alive, and each query's plan is serialised once per
+    schema. A frame changed in place (``df[...] = ...``, ``extend``) keeps
+    its old fingerprint; pass ``fingerprint`` explicitly for those.
+
+    Spilled keys use ``frame_fingerprint``, so a Polars upgrade turns them
+    into misses; the spilled results are never read for the wrong data.
+    """
+
+    def __init__(self, maxsize=128, spill_dir=None):
+        self.maxsize = maxsize
+        self.spill_dir = Path(spill_dir) if spill_dir is not None else None
+        if self.spill_dir is not None:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+        self._entries = OrderedDict()
+        self._fingerprints = {}
+        self._plans = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def fingerprint(self, df):
+        """``frame_fingerprint(df)``, computed once per live frame."""
+        cached = self._fingerprints.get(id(df))
+        if cached is not None and cached[0]() is df:
+            return cached[1]
+        fingerprint = frame_fingerprint(df)
+        frame_id = id(df)
+        self._fingerprints[frame_id] = weakref.ref(df), fingerprint
+        weakref.finalize(df, self._fingerprints.pop, frame_id, None)
+        return fingerprint
+
+    def _plan(self, df, query):
+        plan_key = query, str(df.schema)
+        plan = self._plans.get(plan_key)
+        if plan is None:
+            plan = hashlib.blake2b(query(df.clear().lazy()).serialize(), digest_size=16).digest()
+            self._plans[plan_key] = plan
+            if len(self._plans) > self.maxsize:
+                self._plans.popitem(last=False)
+        else:
+            self._plans.move_to_end(plan_key)
+        return plan
+
+    def key(self, df, query, fingerprint=None):
+        if fingerprint is None:
+            fingerprint = self.fingerprint(df)
+        h = hashlib.blake2b(digest_size=16)
+        h.update(fingerprint.encode())
+        h.update(self._plan(df, query))
+        return h.hexdigest()
+
+    def collect(self, df, query, fingerprint=None):
+        """Return ``query(df.lazy()).collect()``, reusing a cached result if any.
+
+        Without a ``fingerprint`` the frame is hashed on its first query only.
+        """
+        key = self.key(df, query, fingerprint)
+
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+        spilled = self._spill_path(key)
+        if spilled is not None and spilled.exists():
+            result = pl.read_ipc(spilled)
+            self.hits += 1
+        else:
+            result = query(df.lazy()).collect()
+            self.misses += 1
+            if spilled is not None:
+                result.write_ipc(spilled)
+
+        self._entries[key] = result
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return result
+
+    def clear(self, spilled=False):
+        self._entries.clear()
+        if spilled and self.spill_dir is not None:
+            for path in self.spill_dir.glob("*.arrow"):
+                path.unlink()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _spill_path(self, key):
+        if self.spill_dir is None:
+            return None
+        return self.spill_dir / f"{key}.arrow"
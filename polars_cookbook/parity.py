@@ -0,0 +1,389 @@
+"""Checks that the Polars ports agree with the pandas originals.
+
+Every chapter keeps its pandas code next to the Polars port. A
+``ParityCase`` runs the same computation both ways on the same input and
+compares the results. Numeric columns are compared with a tolerance.
+``order="any"`` ignores row order. A case can also check an approximate
+method (a sketch, a streaming mode) against the exact pandas answer with a
+looser tolerance. The report puts time and input memory of both sides next
+to each other, so a performance change also shows it did not change the
+answer.
+
+Inputs can be scaled up synthetically: the bundled year is repeated with
+shifted dates.
+
+Run ``python -m polars_cookbook.parity`` (optionally with scale factors,
+e.g. ``python -m polars_cookbook.parity 1 20``). The exit status is non-zero
+if any case disagrees.
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+import numpy as np
+import polars as pl
+
+from polars_cookbook.bikes_matrix import BikeMatrix
+from polars_cookbook.popcon import read_popcon
+from polars_cookbook.quantiles import BucketedQuantiles
+from polars_cookbook.sketches import SpaceSaving
+
+
+class ParityCase:
+    """One pandas-vs-Polars comparison.
+
+    ``dataset`` names the input (see ``DATASETS``). ``run_pandas`` and
+    ``run_polars`` take the loaded frame and return a pandas object and a
+    Polars DataFrame. Columns are matched by position. ``order`` is "exact"
+    or "any", and ``rtol``/``atol`` apply to numeric columns.
+    """
+
+    def __init__(self, name, dataset, run_pandas, run_polars, order="exact",
+                 rtol=1e-9, atol=0.0):
+        self.name = name
+        self.dataset = dataset
+        self.run_pandas = run_pandas
+        self.run_polars = run_polars
+        self.order = order
+        self.rtol = rtol
+        self.atol = atol
+
+
+def _as_polars(result):
+    import pandas as pd
+
+    if isinstance(result, pd.Series):
+        result = result.to_frame()
+    if isinstance(result, pd.DataFrame):
+        if result.index.name is not None or not isinstance(result.index, pd.RangeIndex):
+            result = result.reset_index()
+        return pl.from_pandas(result)
+    return result
+
+
+def compare(expected, actual, order="exact", rtol=1e-9, atol=0.0):
+    """Return ``(ok, max_abs_diff, message)`` for two frames matched by position."""
+    if expected.width != actual.width:
+        return False, None, f"{expected.width} columns vs {actual.width}"
+    if expected.height != actual.height:
+        return False, None, f"{expected.height} rows vs {actual.height}"
+    actual = actual.rename(dict(zip(actual.columns, expected.columns)))
+    if order == "any":
+        expected = expected.sort(expected.columns, nulls_last=True)
+        actual = actual.select(expected.columns).sort(expected.columns, nulls_last=True)
+
+    max_diff = 0.0
+    for name in expected.columns:
+        left, right = expected[name], actual[name]
+        if left.dtype.is_numeric() and right.dtype.is_numeric():
+            a = left.cast(pl.Float64).to_numpy()
+            b = right.cast(pl.Float64).to_numpy()
+            if not np.allclose(a, b, rtol=rtol, atol=atol, equal_nan=True):
+                return False, float(np.nanmax(np.abs(a - b))), f"column {name!r} differs"
+            if a.size:
+                max_diff = max(max_diff, float(np.nanmax(np.abs(a - b), initial=0.0)))
+        elif left.dtype.is_temporal() or right.dtype.is_temporal():
+            if not (
+                left.cast(pl.Datetime("us")) == right.cast(pl.Datetime("us"))
+            ).all():
+                return False, None, f"column {name!r} differs"
+        elif not (left.cast(pl.String) == right.cast(pl.String)).all():
+            return False, None, f"column {name!r} differs"
+    return True, max_diff, ""
+
+
+def _scaled_years(df, column, scale):
+    """``df`` repeated ``scale`` times, each copy starting one step after the last.
+
+    The shift is the data's span plus its smallest step (366 days for the
+    hourly 2012 weather), so the copies never share a timestamp.
+    """
+    times = df[column].sort()
+    shift = times[-1] - times[0] + times.diff().filter(times.diff() > timedelta(0)).min()
+    return pl.concat([df.with_columns(pl.col(column) + shift * i) for i in range(scale)])
+
+
+def _weather_csv(scale, directory):
+    weather = pl.read_csv("data/weather_2012.csv", try_parse_dates=True)
+    path = os.path.join(directory, f"weather_x{scale}.csv")
+    _scaled_years(weather, "date_time", scale).write_csv(path)
+    return path
+
+
+def _bikes_csv(scale, directory):
+    bikes = pl.read_csv("data/bikes.csv", separator=";", encoding="latin1")
+    bikes = bikes.with_columns(pl.col("Date").str.strptime(pl.Date, "%d/%m/%Y"))
+    path = os.path.join(directory, f"bikes_x{scale}.csv")
+    _scaled_years(bikes, "Date", scale).with_columns(
+        pl.col("Date").dt.strftime("%d/%m/%Y")
+    ).write_csv(path, separator=";")
+    return path
+
+
+def _complaints_csv(scale, directory):
+    rng = np.random.default_rng(scale)
+    rows = 100_000 * scale
+    types = [f"Complaint {i}" for i in range(200)]
+    weights = 1 / np.arange(1, len(types) + 1)
+    path = os.path.join(directory, f"311_x{scale}.csv")
+    pl.DataFrame(
+        {
+            "Complaint Type": rng.choice(types, rows, p=weights / weights.sum()),
+            "Borough": rng.choice(["BROOKLYN", "QUEENS", "BRONX"], rows),
+        }
+    ).write_csv(path)
+    return path
+
+
+def _load_weather(path):
+    import pandas as pd
+
+    return (
+        pd.read_csv(path, parse_dates=["date_time"], index_col="date_time"),
+        pl.read_csv(path, try_parse_dates=True),
+    )
+
+
+def _load_bikes(path):
+    import pandas as pd
+
+    pandas_df = pd.read_csv(
+        path, sep=";", parse_dates=["Date"], dayfirst=True, index_col="Date"
+    )
+    polars_df = pl.read_csv(path, separator=";").with_columns(
+        pl.col("Date").str.strptime(pl.Date, "%d/%m/%Y")
+    )
+    return pandas_df, polars_df
+
+
+def _load_complaints(path):
+    import pandas as pd
+
+    return pd.read_csv(path, dtype="unicode"), pl.read_csv(path, infer_schema_length=0)
+
+
+def _load_popcon(path):
+    import pandas as pd
+
+    pandas_df = pd.read_csv(path, sep=" ", header=None, skiprows=1, skipfooter=1,
+                            engine="python",
+                            names=["atime", "ctime", "package-name", "mru-program", "tag"])
+    return pandas_df, read_popcon(path)[1]
+
+
+DATASETS = {
+    "weather": (_weather_csv, _load_weather),
+    "bikes": (_bikes_csv, _load_bikes),
+    "complaints": (_complaints_csv, _load_complaints),
+    "popcon": (lambda scale, directory: "data/popularity-contest", _load_popcon),
+}
+
+
+def _month_end():
+    """pandas' month-end frequency alias: "ME" since pandas 2.2, "M" before."""
+    import pandas as pd
+
+    major, minor = (int(part) for part in pd.__version__.split(".")[:2])
+    return "ME" if (major, minor) >= (2, 2) else "M"
+
+
+def _pl_hourly_median(df):
+    return (
+        df.group_by(pl.col("date_time").dt.hour().alias("hour"))
+        .agg(pl.col("temperature_c").median())
+        .sort("hour")
+    )
+
+
+def _pl_hourly_median_sketch(df):
+    sketches = BucketedQuantiles(pl.col("date_time").dt.hour())
+    for part in df.iter_slices(24 * 31):
+        sketches.update(part, "temperature_c")
+    return sketches.quantiles([0.5]).select("bucket", "q0.5")
+
+
+def _pl_monthly(df, expr):
+    return (
+        df.sort("date_time")
+        .group_by_dynamic("date_time", every="1mo")
+        .agg(expr)
+        .select(pl.col("date_time").dt.offset_by("1mo").dt.offset_by("-1d").dt.date(), expr.meta.output_name())
+    )
+
+
+def _pl_top_complaints(df):
+    return (
+        df.group_by("Complaint Type")
+        .len()
+        .sort(["len", "Complaint Type"], descending=[True, False])
+        .head(10)
+    )
+
+
+def _pl_top_complaints_sketch(df):
+    sketch = SpaceSaving(capacity=100)
+    for batch in df.iter_slices(10_000):
+        sketch.update(batch["Complaint Type"])
+    # Ties in count are ordered by value, as in the exact query
+    return (
+        sketch.top_k(10)
+        .sort(["count", "value"], descending=[True, False])
+        .select("value", "count")
+    )
+
+
+def _pd_top_complaints(df):
+    counts = df["Complaint Type"].value_counts()
+    counts = counts.rename_axis("Complaint Type").reset_index(name="n")
+    return counts.sort_values(["n", "Complaint Type"], ascending=[False, True]).head(10).reset_index(drop=True)
+
+
+def _pd_weekday_profile(df):
+    return df[["Berri 1", "Rachel1"]].groupby(df.index.weekday).mean()
+
+
+def _pl_weekday_profile(df):
+    matrix = BikeMatrix.from_frame(df.select("Date", "Berri 1", "Rachel1"))
+    profile = matrix.weekday_profile()
+    return pl.DataFrame(
+        {"weekday": range(7), "Berri 1": profile[:, 0], "Rachel1": profile[:, 1]}
+    )
+
+
+def _pd_nonlibraries(df):
+    import pandas as pd
+
+    df = df.copy()
+    df["atime"] = pd.to_datetime(df["atime"].astype(int), unit="s")
+    df["ctime"] = pd.to_datetime(df["ctime"].astype(int), unit="s")
+    df = df[df["atime"] > "1970-01-01"]
+    nonlibraries = df[~df["package-name"].str.contains("lib")]
+    return nonlibraries.sort_values("ctime", ascending=False)[:10][
+        ["package-name", "ctime"]
+    ].reset_index(drop=True)
+
+
+def _pl_nonlibraries(df):
+    return (
+        df.with_columns(pl.from_epoch("atime"), pl.from_epoch("ctime"))
+        .filter(pl.col("atime") > pl.datetime(1970, 1, 1))
+        .filter(~pl.col("package-name").str.contains("lib"))
+        .sort("ctime", descending=True, maintain_order=True)
+        .head(10)
+        .select("package-name", "ctime")
+    )
+
+
+CASES = [
+    ParityCase(
+        "ch5 hour-of-day median",
+        "weather",
+        lambda df: df[["temperature_c"]].groupby(df.index.hour).median(),
+        _pl_hourly_median,
+    ),
+    ParityCase(
+        "ch5 hour-of-day median (t-digest)",
+        "weather",
+        lambda df: df[["temperature_c"]].groupby(df.index.hour).median(),
+        _pl_hourly_median_sketch,
+        atol=0.5,
+    ),
+    ParityCase(
+        "ch6 monthly median temperature",
+        "weather",
+        lambda df: df["temperature_c"].resample(_month_end()).median(),
+        lambda df: _pl_monthly(df, pl.col("temperature_c").median()),
+    ),
+    ParityCase(
+        "ch6 monthly snow fraction",
+        "weather",
+        lambda df: df["weather"].str.contains("Snow").astype(float).resample(_month_end()).mean(),
+        lambda df: _pl_monthly(df, pl.col("weather").str.contains("Snow").mean()),
+    ),
+    ParityCase(
+        "ch4 weekday profile",
+        "bikes",
+        _pd_weekday_profile,
+        _pl_weekday_profile,
+    ),
+    ParityCase(
+        "ch2 top 10 complaint types",
+        "complaints",
+        _pd_top_complaints,
+        _pl_top_complaints,
+    ),
+    ParityCase(
+        "ch2 top 10 complaint types (Space-Saving)",
+        "complaints",
+        _pd_top_complaints,
+        _pl_top_complaints_sketch,
+        rtol=0.01,
+    ),
+    ParityCase(
+        "ch8 newest non-libraries",
+        "popcon",
+        _pd_nonlibraries,
+        _pl_nonlibraries,
+        # pandas' default sort is not stable; packages sharing a ctime swap
+        order="any",
+    ),
+]
+
+
+def _pandas_bytes(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+def _timed(func, frame):
+    started = time.perf_counter()
+    result = func(frame)
+    return result, time.perf_counter() - started
+
+
+def run_parity(cases=CASES, scales=(1,)):
+    """Run every case at every scale; one report row per case and scale."""
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for scale in scales:
+            loaded = {}
+            for case in cases:
+                if case.dataset not in loaded:
+                    make, load = DATASETS[case.dataset]
+                    loaded[case.dataset] = load(make(scale, directory))
+                pandas_df, polars_df = loaded[case.dataset]
+
+                expected, pandas_s = _timed(case.run_pandas, pandas_df)
+                actual, polars_s = _timed(case.run_polars, polars_df)
+                ok, max_diff, message = compare(
+                    _as_polars(expected), actual, case.order, case.rtol, case.atol
+                )
+                rows.append(
+                    {
+                        "case": case.name,
+                        "scale": scale,
+                        "rows": polars_df.height,
+                        "ok": ok,
+                        "max_abs_diff": max_diff,
+                        "message": message,
+                        "pandas_s": pandas_s,
+                        "polars_s": polars_s,
+                        "speedup": pandas_s / polars_s if polars_s else None,
+                        "input_memory_ratio": _pandas_bytes(pandas_df)
+                        / max(polars_df.estimated_size(), 1),
+                    }
+                )
+    return pl.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    scales = [int(arg) for arg in sys.argv[1:]] or [1, 10]
+    with pl.Config(tbl_rows=-1, tbl_cols=-1, fmt_str_lengths=45):
+        report = run_parity(scales=scales)
+        print(report.drop("message"))
+    failures = report.filter(~pl.col("ok"))
+    if not failures.is_empty():
+        print(failures.select("case", "scale", "message"))
+        sys.exit(1)
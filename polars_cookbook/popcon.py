@@ -0,0 +1,136 @@
+"""Reading popularity-contest reports and storing them compactly.
+
+A report is one header line (``POPULARITY-CONTEST-0 TIME:... ID:... ARCH:...``),
+one ``atime ctime package mru-program [tag]`` line per package, and an
+``END-POPULARITY-CONTEST-0`` footer. Chapter 8 reads it with pandas.
+
+The archive format (a compressed ``.npz``) stores
+
+* atime sorted ascending and delta-encoded, ctime as an offset from atime,
+* the directory of ``mru-program`` dictionary-encoded (a few hundred
+  distinct directories across thousands of packages),
+* every tag (``<OLD>``, ``<RECENT-CTIME>``, ``<NOFILES>``) as a packed bitmap.
+
+Decoded numeric arrays are handed to Polars without another copy.
+"""
+
+import json
+
+import numpy as np
+import polars as pl
+
+COLUMNS = ["atime", "ctime", "package-name", "mru-program", "tag"]
+TAGS = ["<OLD>", "<RECENT-CTIME>", "<NOFILES>"]
+
+
+def parse_header(line):
+    """``{"TIME": ..., "ID": ..., "ARCH": ..., "POPCONVER": ...}`` from the first line."""
+    fields = dict(
+        part.split(":", 1) for part in line.split()[1:] if ":" in part
+    )
+    if "TIME" in fields:
+        fields["TIME"] = int(fields["TIME"])
+    return fields
+
+
+def read_popcon(path):
+    """Return ``(header, frame)`` for one report, with chapter 8's column names.
+
+    ``<NOFILES>`` packages have no program; the marker is moved to ``tag``.
+    """
+    with open(path, encoding="utf-8", errors="replace") as f:
+        header = parse_header(f.readline())
+    lines = pl.read_csv(
+        path,
+        has_header=False,
+        new_columns=["line"],
+        separator="\x1f",
+        quote_char=None,
+        skip_rows=1,
+        encoding="utf8-lossy",
+    )
+    fields = (
+        lines.filter(~pl.col("line").str.starts_with("END-POPULARITY-CONTEST"))
+        .select(pl.col("line").str.split_exact(" ", 4))
+        .unnest("line")
+    )
+    fields.columns = COLUMNS
+    no_files = pl.col("mru-program") == "<NOFILES>"
+    frame = fields.with_columns(
+        pl.col("atime").cast(pl.Int64),
+        pl.col("ctime").cast(pl.Int64),
+        pl.when(no_files).then(None).otherwise(pl.col("mru-program")).alias("mru-program"),
+        pl.when(no_files).then(pl.lit("<NOFILES>")).otherwise(pl.col("tag")).alias("tag"),
+    )
+    return header, frame
+
+
+def _pack_strings(values):
+    # Every value is terminated, so [] and [""] stay distinguishable
+    return np.frombuffer("".join(f"{v}\n" for v in values).encode(), dtype=np.uint8)
+
+
+def _unpack_strings(blob):
+    return blob.tobytes().decode().split("\n")[:-1]
+
+
+def write_popcon_archive(path, header, frame):
+    """Write one report in the compact archive format (rows sorted by atime)."""
+    frame = frame.sort("atime", maintain_order=True)
+    atime = frame["atime"].to_numpy()
+    programs = frame["mru-program"]
+    directories = programs.str.extract(r"^(.*)/[^/]*$").fill_null("")
+    dictionary, codes = np.unique(directories.to_numpy().astype(str), return_inverse=True)
+    code_dtype = np.uint16 if len(dictionary) <= 2**16 else np.uint32
+    arrays = {
+        "header": np.frombuffer(json.dumps(header).encode(), dtype=np.uint8),
+        "rows": np.array([frame.height]),
+        "atime_first": atime[:1],
+        "atime_delta": np.diff(atime).astype(np.uint32),
+        "ctime_offset": (frame["atime"] - frame["ctime"]).to_numpy().astype(np.int64),
+        "package": _pack_strings(frame["package-name"].to_list()),
+        "mru_dir_dictionary": _pack_strings(dictionary.tolist()),
+        "mru_dir_code": codes.astype(code_dtype),
+        "mru_name": _pack_strings(
+            programs.str.extract(r"([^/]*)$").fill_null("").to_list()
+        ),
+        "mru_missing": np.packbits(programs.is_null().to_numpy()),
+    }
+    for tag in TAGS:
+        arrays[f"tag{tag}"] = np.packbits((frame["tag"] == tag).fill_null(False).to_numpy())
+    np.savez_compressed(path, **arrays)
+
+
+def read_popcon_archive(path):
+    """Return ``(header, frame)`` from an archive written by ``write_popcon_archive``.
+
+    ``atime``/``ctime`` are UInt32 epoch seconds (``pl.from_epoch`` turns them
+    into datetimes); ``mru-dir`` is Categorical and each tag is a Boolean.
+    """
+    with np.load(path) as archive:
+        rows = int(archive["rows"][0])
+        header = json.loads(archive["header"].tobytes().decode())
+        atime = np.empty(rows, dtype=np.uint32)
+        if rows:
+            atime[0] = archive["atime_first"][0]
+            np.cumsum(archive["atime_delta"], out=atime[1:])
+            atime[1:] += atime[0]
+        ctime = (atime - archive["ctime_offset"]).astype(np.uint32)
+        dictionary = pl.Series(
+            "mru-dir", _unpack_strings(archive["mru_dir_dictionary"]), dtype=pl.Categorical
+        )
+        missing = np.unpackbits(archive["mru_missing"], count=rows).astype(bool)
+        names = pl.Series("mru-name", _unpack_strings(archive["mru_name"]))
+        names = names.set(pl.Series(missing), None)
+        columns = [
+            pl.Series("atime", atime),
+            pl.Series("ctime", ctime),
+            pl.Series("package-name", _unpack_strings(archive["package"])),
+            dictionary.gather(archive["mru_dir_code"]),
+            names,
+        ]
+        columns += [
+            pl.Series(tag, np.unpackbits(archive[f"tag{tag}"], count=rows).astype(bool))
+            for tag in TAGS
+        ]
+    return header, pl.DataFrame(columns)
@@ -0,0 +1,165 @@
+"""Fleet-wide aggregation of popularity-contest reports.
+
+Chapter 8 looks at the report of a single machine. Here a directory of
+reports (one per host) is parsed in parallel. Each report keeps the ID and
+ARCH of its header. The per-package statistics are computed with one lazy
+``group_by`` over all hosts. Reports added later are parsed on their own
+and replace the previous report of the same host. Only the packages those
+reports mention are summarised again.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import polars as pl
+
+from polars_cookbook.popcon import read_popcon
+
+SECONDS_PER_DAY = 86_400
+
+
+def load_report(path):
+    """One report as a frame with ``host_id``, ``arch`` and ``report_time`` added."""
+    header, frame = read_popcon(path)
+    if header.get("ID") is None:
+        # Without it, every such report would count as the same host
+        raise ValueError(f"{path}: popcon header has no ID")
+    return frame.with_columns(
+        host_id=pl.lit(header.get("ID")),
+        arch=pl.lit(header.get("ARCH")),
+        report_time=pl.lit(header.get("TIME"), dtype=pl.Int64),
+    )
+
+
+def _try_load(path):
+    """``(frame, None)``, or ``(None, error)`` so one bad report does not stop the rest."""
+    try:
+        return load_report(path), None
+    except Exception as error:
+        return None, error
+
+
+def fleet_summary(reports):
+    """Per-package statistics over a LazyFrame or DataFrame of reports.
+
+    Columns: hosts (installs), used_hosts, arches, atime/ctime age
+    percentiles in days relative to each report, and never_used (installed
+    somewhere, but no host has a recorded access).
+    """
+    used = (pl.col("atime") > 0) & pl.col("tag").ne_missing("<NOFILES>")
+    atime_age = (pl.col("report_time") - pl.col("atime")) / SECONDS_PER_DAY
+    ctime_age = (pl.col("report_time") - pl.col("ctime")) / SECONDS_PER_DAY
+    return (
+        reports.lazy()
+        .group_by("package-name")
+        .agg(
+            hosts=pl.col("host_id").n_unique(),
+            used_hosts=pl.col("host_id").filter(used).n_unique(),
+            arches=pl.col("arch").unique().sort(),
+            atime_age_p10=atime_age.filter(used).quantile(0.1),
+            atime_age_p50=atime_age.filter(used).quantile(0.5),
+            atime_age_p90=atime_age.filter(used).quantile(0.9),
+            ctime_age_p50=ctime_age.filter(pl.col("ctime") > 0).quantile(0.5),
+        )
+        .with_columns(never_used=pl.col("used_hosts") == 0)
+        .sort("hosts", descending=True)
+        .collect()
+    )
+
+
+class PopconFleet:
+    """Latest report per host, updated incrementally from a directory.
+
+    Example:
+        fleet = PopconFleet()
+        fleet.add_directory("reports/")   # parses every report
+        fleet.add_directory("reports/")   # later: only new or changed files
+        fleet.summary().filter(pl.col("never_used"))
+
+    Reports that fail to parse (including those without an ID) are kept in
+    ``errors`` by path and retried by the next ``add_directory``.
+    """
+
+    def __init__(self, n_workers=None):
+        self.n_workers = n_workers or os.cpu_count()
+        self.reports = {}
+        self.errors = {}
+        self._seen = {}
+        self._fleet = None
+        self._summary = None
+        self._stale = set()
+
+    def add_reports(self, paths):
+        """Parse the given report files in parallel. Returns how many were new.
+
+        A report is new if its host has no report yet or only an older one;
+        a copy of a report already held does not count.
+        """
+        paths = list(paths)
+        with ThreadPoolExecutor(self.n_workers) as pool:
+            results = list(pool.map(_try_load, paths))
+        replaced = {}
+        for path, (frame, error) in zip(paths, results):
+            if error is not None:
+                self.errors[path] = error
+                continue
+            self.errors.pop(path, None)
+            if frame.is_empty():
+                continue
+            host, time = frame["host_id"][0], frame["report_time"][0]
+            previous = self.reports.get(host)
+            if previous is None or previous["report_time"][0] < time:
+                replaced.setdefault(host, previous)
+                self.reports[host] = frame
+        self._fold(replaced)
+        return len(replaced)
+
+    def _fold(self, replaced):
+        """Swap the rows of the ``replaced`` hosts and mark their packages stale."""
+        if not replaced:
+            return
+        frames = [self.reports[host] for host in replaced]
+        frames += [previous for previous in replaced.values() if previous is not None]
+        for frame in frames:
+            self._stale.update(frame["package-name"].unique().to_list())
+        kept = []
+        if self._fleet is not None:
+            kept = [self._fleet.filter(~pl.col("host_id").is_in(list(replaced)))]
+        self._fleet = pl.concat(
+            kept + [self.reports[host] for host in replaced], how="vertical_relaxed"
+        )
+
+    def add_directory(self, directory, pattern="*"):
+        """Parse the reports in ``directory`` that are new or changed since last time."""
+        changed = {}
+        for path in sorted(Path(directory).glob(pattern)):
+            if not path.is_file():
+                continue
+            stat = path.stat()
+            stamp = stat.st_mtime_ns, stat.st_size
+            if self._seen.get(path) != stamp:
+                changed[path] = stamp
+        added = self.add_reports(changed)
+        # Only parsed reports are remembered; failed ones are tried again next time
+        for path, stamp in changed.items():
+            if path not in self.errors:
+                self._seen[path] = stamp
+        return added
+
+    def frame(self):
+        if self._fleet is None:
+            raise ValueError("no popcon reports have been added yet")
+        return self._fleet
+
+    def summary(self):
+        """``fleet_summary`` of the current reports, recomputed only for stale packages."""
+        fleet = self.frame()
+        if self._stale:
+            stale = pl.col("package-name").is_in(sorted(self._stale))
+            kept = [] if self._summary is None else [self._summary.filter(~stale)]
+            self._summary = pl.concat(
+                kept + [fleet_summary(fleet.filter(stale))], how="vertical_relaxed"
+            ).sort("hosts", descending=True)
+            self._stale = set()
+        return self._summary
@@ -0,0 +1,169 @@
+"""Per-stage timing and memory instrumentation for the chapter pipelines.
+
+Wrap each stage in ``profiler.stage(name)`` (or decorate a function with
+``profiler.timed(name)``). Every stage records its wall time, peak memory
+and whatever sizes the caller fills in (``bytes_in``, ``bytes_out``,
+``rows``). The records can be written as JSON lines or as a Chrome
+trace-event file that opens in chrome://tracing or https://ui.perfetto.dev.
+"""
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import polars as pl
+
+
+class Profiler:
+    """Collects one record per pipeline stage.
+
+    Example:
+        profiler = Profiler(capture_plans=True)
+        with profiler.stage("fetch", month=3) as record:
+            response = requests.get(url)
+            record["bytes_in"] = len(response.content)
+        df = profiler.collect(lf, "clean")
+        profiler.write_chrome_trace("weather_trace.json")
+
+    ``trace_python_memory`` turns on tracemalloc to get the peak of Python
+    allocations inside each stage (e.g. ``response.text``). Allocations made
+    by Polars itself only show up in the resident set size. The OS reports
+    only its high-water mark for the whole process. ``process_peak_rss_mb``
+    is that mark when the stage ends. ``peak_rss_growth_mb`` is how far the
+    stage raised it, which is zero for a stage that stayed below an earlier
+    peak. Both are None on Windows.
+    """
+
+    def __init__(self, enabled=True, capture_plans=False, trace_python_memory=False):
+        self.enabled = enabled
+        self.capture_plans = capture_plans
+        self.trace_python_memory = trace_python_memory
+        self.records = []
+        self._origin = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name, **fields):
+        record = {"stage": name, **fields}
+        if not self.enabled:
+            yield record
+            return
+
+        tracing = self.trace_python_memory and not tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.start()
+        elif self.trace_python_memory:
+            tracemalloc.reset_peak()
+        peak_before = peak_rss_mb()
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["start_s"] = started - self._origin
+            record["wall_s"] = time.perf_counter() - started
+            record["thread"] = threading.get_ident()
+            peak_after = peak_rss_mb()
+            record["process_peak_rss_mb"] = peak_after
+            record["peak_rss_growth_mb"] = (
+                peak_after - peak_before if peak_after is not None else None
+            )
+            if self.trace_python_memory:
+                record["python_peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+            if tracing:
+                tracemalloc.stop()
+            self.records.append(record)
+
+    def timed(self, name=None):
+        """Decorator form of ``stage``. Row counts of returned frames are recorded."""
+
+        def decorator(func):
+            stage_name = name or func.__name__
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(stage_name) as record:
+                    result = func(*args, **kwargs)
+                    if isinstance(result, pl.DataFrame):
+                        record["rows"] = result.height
+                        record["bytes_out"] = result.estimated_size()
+                return result
+
+            return wrapper
+
+        return decorator
+
+    def collect(self, lf, name):
+        """Collect a LazyFrame as a stage, keeping its plan when capture_plans is on."""
+        with self.stage(name) as record:
+            if self.capture_plans:
+                record["plan"] = lf.explain()
+            if self.capture_plans and hasattr(lf, "profile"):
+                df, timings = lf.profile()
+                record["node_timings"] = timings.to_dicts()
+            else:
+                df = lf.collect()
+            record["rows"] = df.height
+            record["bytes_out"] = df.estimated_size()
+        return df
+
+    def to_frame(self):
+        """One row per stage; plans and node timings are left out."""
+        return pl.DataFrame(
+            [
+                {k: v for k, v in r.items() if k not in ("plan", "node_timings")}
+                for r in self.records
+            ],
+            infer_schema_length=None,
+        )
+
+    def summary(self):
+        """Total wall time per stage name, slowest first."""
+        return (
+            self.to_frame()
+            .group_by("stage")
+            .agg(calls=pl.len(), wall_s=pl.col("wall_s").sum())
+            .sort("wall_s", descending=True)
+        )
+
+    def write_log(self, path):
+        """Write the records as JSON lines."""
+        with open(path, "w") as f:
+            for record in self.records:
+                f.write(json.dumps(record, default=str) + "\n")
+
+    def write_chrome_trace(self, path):
+        """Write the records as Chrome trace-event "complete" (X) events."""
+        pid = os.getpid()
+        events = [
+            {
+                "name": r["stage"],
+                "ph": "X",
+                "ts": r["start_s"] * 1e6,
+                "dur": r["wall_s"] * 1e6,
+                "pid": pid,
+                "tid": r["thread"],
+                "args": {
+                    k: v
+                    for k, v in r.items()
+                    if k not in ("stage", "start_s", "wall_s", "thread")
+                },
+            }
+            for r in self.records
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events}, f, default=str)
+
+
+def peak_rss_mb():
+    """High-water mark of this process's resident set size, or None on Windows."""
+    if sys.platform == "win32":
+        return None
+    import resource
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / 2**20 if sys.platform == "darwin" else max_rss / 2**10
@@ -0,0 +1,147 @@
+"""Headless rendering of the chapter charts to files, in parallel.
+
+The charts in CH1.py and CH5.py end in ``plt.show()``, which needs a
+display and blocks until the window is closed. For nightly reports over
+many stations, bike paths and months, each chart is described by a
+``Chart``: plain NumPy columns plus labels, small enough to pickle. The
+charts are then drawn in worker processes with matplotlib's Agg canvas
+and saved straight to PNG or SVG, chosen by the file suffix. Workers use
+the object-oriented ``Figure`` API, so no pyplot state or GUI backend is
+involved, and the total time shrinks with the number of cores.
+
+Workers are started with "spawn" because forking a process that has
+already started Polars' thread pool can deadlock.
+
+Run ``python -m polars_cookbook.reports`` to render the per-path, per-month
+and per-station charts with 1 and with all cores.
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import polars as pl
+
+from polars_cookbook.headers import snake_case
+
+
+class Chart:
+    """One line chart: ``x`` against each array in ``series`` (label -> values).
+
+    ``path`` decides the output format (".png" or ".svg").
+    """
+
+    def __init__(self, path, x, series, title="", xlabel="", ylabel="",
+                 figsize=(15, 5), dpi=100):
+        self.path = str(path)
+        self.x = x
+        self.series = series
+        self.title = title
+        self.xlabel = xlabel
+        self.ylabel = ylabel
+        self.figsize = figsize
+        self.dpi = dpi
+
+
+def render(chart):
+    """Draw ``chart`` on an Agg canvas and save it; returns ``(path, seconds)``."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    started = time.perf_counter()
+    figure = Figure(figsize=chart.figsize, dpi=chart.dpi)
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot()
+    for label, values in chart.series.items():
+        axes.plot(chart.x, values, label=label)
+    axes.set_title(chart.title)
+    axes.set_xlabel(chart.xlabel)
+    axes.set_ylabel(chart.ylabel)
+    if len(chart.series) > 1:
+        axes.legend()
+    figure.autofmt_xdate()
+    figure.savefig(chart.path)
+    return chart.path, time.perf_counter() - started
+
+
+def render_charts(charts, workers=None, chunksize=4):
+    """Render ``charts`` in ``workers`` processes (all cores by default).
+
+    Returns one row per chart with its path and drawing time.
+    """
+    charts = list(charts)
+    for chart in charts:
+        Path(chart.path).parent.mkdir(parents=True, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = [render(chart) for chart in charts]
+    else:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(workers, mp_context=context) as pool:
+            results = list(pool.map(render, charts, chunksize=chunksize))
+    return pl.DataFrame(results, schema=["path", "seconds"], orient="row")
+
+
+def bike_path_charts(bikes, out_dir, fmt="png"):
+    """CH1's chart, one file per bike path, from ``load_bikes()``."""
+    x = bikes["Date"].to_numpy()
+    return [
+        Chart(
+            Path(out_dir) / f"bikes_{snake_case(column)}.{fmt}",
+            x,
+            {column: bikes[column].to_numpy()},
+            title=f"Cyclists on {column}",
+            xlabel="Date",
+            ylabel="Cyclist Count",
+        )
+        for column in bikes.columns
+        if column != "Date" and bikes[column].null_count() < bikes.height
+    ]
+
+
+def weather_month_charts(weather, out_dir, time_column="date_time",
+                         value_column="temperature_c", station_column=None, fmt="png"):
+    """CH5's hourly temperature chart, one file per month (and station)."""
+    keys = [pl.col(time_column).dt.strftime("%Y-%m").alias("_month")]
+    if station_column is not None:
+        keys.append(pl.col(station_column).alias("_station"))
+    charts = []
+    for key, part in weather.with_columns(keys).partition_by(
+        [k.meta.output_name() for k in keys], as_dict=True, maintain_order=True
+    ).items():
+        month, station = (key + (None,))[:2]
+        name = f"{snake_case(station)}_{month}" if station is not None else month
+        charts.append(
+            Chart(
+                Path(out_dir) / f"weather_{name}.{fmt}",
+                part[time_column].to_numpy(),
+                {value_column: part[value_column].to_numpy()},
+                title=f"Hourly temperature, {month}" + (f", {station}" if station else ""),
+                xlabel="Date",
+                ylabel="Temperature (°C)",
+            )
+        )
+    return charts
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    from polars_cookbook.bikes_weather import load_bikes
+
+    weather = pl.read_csv("data/weather_2012.csv", try_parse_dates=True)
+    # Pretend there are several stations reporting the same year
+    stations = pl.concat(
+        [weather.with_columns(pl.lit(f"Station {i}").alias("station")) for i in range(4)]
+    )
+    with tempfile.TemporaryDirectory() as out_dir:
+        charts = bike_path_charts(load_bikes(), out_dir) + weather_month_charts(
+            stations, out_dir, station_column="station"
+        )
+        for workers in sorted({1, os.cpu_count() or 1}):
+            started = time.perf_counter()
+            rendered = render_charts(charts, workers=workers)
+            elapsed = time.perf_counter() - started
+            print(f"{rendered.height} charts with {workers} worker(s): {elapsed:.2f}s")
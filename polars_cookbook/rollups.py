@@ -0,0 +1,351 @@
+"""Pre-aggregated rollups of the hourly weather data.
+
+CH5.py's hour-of-day medians and chapter 6's monthly snow and temperature
+numbers each re-aggregate every hourly row on every query. ``WeatherRollups``
+keeps three small summary tables next to the raw hours:
+
+* ``month``: one row per month
+* ``month_hour``: one row per month and hour of day
+* ``day``: one row per day
+
+Each row holds count, sum, min and max per value column, the t-digest
+centroids for the median, and the number of hours whose description
+mentions snow. Every one of these merges (sums, min of mins, pooled
+centroids), so appending a month only aggregates the new rows and then
+merges them into the tables. ``query`` answers from the coarsest table that
+has the requested grouping and whose rows line up with the requested time
+range. Only ranges that cut through a day fall back to the raw rows.
+"""
+
+from datetime import date, datetime
+from pathlib import Path
+
+import polars as pl
+
+from polars_cookbook.quantiles import TDigest
+
+# name -> (row keys, groupings it can answer, alignment of its time key);
+# coarsest first, which is the order queries are routed in
+_LEVELS = {
+    "month": (["month"], {None, "year", "month"}, "month"),
+    "month_hour": (["month", "hour"], {None, "year", "month", "hour"}, "month"),
+    "day": (["date"], {None, "year", "month", "day"}, "day"),
+}
+
+
+def _as_datetime(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    return datetime.fromisoformat(value)
+
+
+def _aligned(value, alignment):
+    if value is None:
+        return True
+    midnight = value.time() == datetime.min.time()
+    return midnight and (alignment == "day" or value.day == 1)
+
+
+class WeatherRollups:
+    """Hourly weather data plus mergeable month, month-by-hour and day rollups.
+
+    Example:
+        rollups = WeatherRollups("date_time", ["temperature_c"])
+        for month in months:
+            rollups.append(month)
+        rollups.query(by="hour")                        # from month_hour
+        rollups.query(by="month", start="2012-03-01")   # from month
+        rollups.route(by="day", start="2012-03-01 06:00")  # "raw"
+
+    ``snow_column`` names the weather description column. Leave it as None
+    if there is none, and the ``snow_fraction`` output is not computed.
+    """
+
+    def __init__(self, time_column="date_time", value_columns=("temperature_c",),
+                 snow_column="weather", compression=100):
+        self.time_column = time_column
+        self.value_columns = list(value_columns)
+        self.snow_column = snow_column
+        self.compression = compression
+        self.tables = {name: None for name in _LEVELS}
+        self._raw = None
+
+    def _raw_columns(self):
+        columns = [self.time_column, *self.value_columns]
+        if self.snow_column is not None:
+            columns.append(self.snow_column)
+        return columns
+
+    @property
+    def raw(self):
+        """The appended hourly rows as one LazyFrame."""
+        if self._raw is None:
+            return pl.LazyFrame(schema={c: pl.Null for c in self._raw_columns()})
+        return self._raw.lazy()
+
+    def _row_keys(self):
+        t = pl.col(self.time_column)
+        return {
+            "month": t.dt.truncate("1mo").dt.date().alias("month"),
+            "hour": t.dt.hour().alias("hour"),
+            "date": t.dt.date().alias("date"),
+        }
+
+    def _partial_aggs(self):
+        aggs = []
+        for c in self.value_columns:
+            values = pl.col(c).cast(pl.Float64)
+            # Raw values are centroids of weight 1 until compressed
+            centroids = values.filter(values.is_not_nan())
+            aggs += [
+                values.count().alias(f"{c}_count"),
+                values.sum().alias(f"{c}_sum"),
+                values.min().alias(f"{c}_min"),
+                values.max().alias(f"{c}_max"),
+                centroids.alias(f"{c}_means"),
+                centroids.is_not_nan().cast(pl.Float64).alias(f"{c}_weights"),
+            ]
+        if self.snow_column is not None:
+            weather = pl.col(self.snow_column)
+            aggs += [
+                weather.str.contains("Snow").sum().cast(pl.Int64).alias("snow_hours"),
+                weather.count().alias("weather_hours"),
+            ]
+        return aggs
+
+    def _merge_aggs(self):
+        aggs = []
+        for c in self.value_columns:
+            aggs += [
+                pl.col(f"{c}_count").sum(),
+                pl.col(f"{c}_sum").sum(),
+                pl.col(f"{c}_min").min(),
+                pl.col(f"{c}_max").max(),
+                pl.col(f"{c}_means").explode(),
+                pl.col(f"{c}_weights").explode(),
+            ]
+        if self.snow_column is not None:
+            aggs += [pl.col("snow_hours").sum(), pl.col("weather_hours").sum()]
+        return aggs
+
+    def _compress(self, table):
+        """Re-cluster the pooled centroids of every row into a t-digest."""
+        replacements = []
+        for c in self.value_columns:
+            means, weights = [], []
+            for m, w in zip(table[f"{c}_means"], table[f"{c}_weights"]):
+                digest = TDigest.from_centroids(m.to_numpy(), w.to_numpy(), self.compression)
+                means.append(digest.means.tolist())
+                weights.append(digest.weights.tolist())
+            replacements += [
+                pl.Series(f"{c}_means", means, dtype=pl.List(pl.Float64)),
+                pl.Series(f"{c}_weights", weights, dtype=pl.List(pl.Float64)),
+            ]
+        return table.with_columns(replacements)
+
+    def append(self, df):
+        """Add hourly rows (typically one month) and fold them into every rollup.
+
+        Rows may belong to periods that are already present (late or
+        corrected data); their aggregates are merged, not replaced. Only
+        the rows whose keys the new hours touch are merged and
+        re-compressed, so an append costs the same however long the
+        history is.
+        """
+        hours = df.select(self._raw_columns())
+        if self._raw is None:
+            self._raw = hours
+        else:
+            self._raw = pl.concat([self._raw, hours], how="vertical_relaxed", rechunk=False)
+        row_keys = self._row_keys()
+        for name, (keys, _, _) in _LEVELS.items():
+            partial = (
+                hours.lazy()
+                .filter(pl.col(self.time_column).is_not_null())
+                .group_by([row_keys[k] for k in keys])
+                .agg(self._partial_aggs())
+                .collect()
+            )
+            table = self.tables[name]
+            if table is None:
+                self.tables[name] = self._compress(partial).sort(keys)
+                continue
+            touched = table.join(partial.select(keys), on=keys, how="semi")
+            if touched.height:
+                partial = (
+                    pl.concat([touched, partial], how="vertical_relaxed")
+                    .group_by(keys)
+                    .agg(self._merge_aggs())
+                )
+            # Upsert: drop the old versions of the touched rows, add the merged ones
+            self.tables[name] = pl.concat(
+                [
+                    table.join(partial.select(keys), on=keys, how="anti"),
+                    self._compress(partial).select(table.columns),
+                ],
+                how="vertical_relaxed",
+            ).sort(keys)
+        return self
+
+    def route(self, by=None, start=None, end=None):
+        """Name of the table ``query`` would read: a rollup level or "raw"."""
+        start, end = _as_datetime(start), _as_datetime(end)
+        for name, (_, groupings, alignment) in _LEVELS.items():
+            if self.tables[name] is None:
+                continue
+            if by in groupings and _aligned(start, alignment) and _aligned(end, alignment):
+                return name
+        return "raw"
+
+    def query(self, by=None, start=None, end=None):
+        """Summary statistics per ``by`` over ``start <= time < end``.
+
+        ``by`` is None (one row for the whole range), "year", "month", "day"
+        or "hour" (hour of day). For each value column ``c`` the result has
+        ``c_count``, ``c_sum``, ``c_min``, ``c_max``, ``c_mean`` and
+        ``c_median``, plus ``snow_fraction`` if there is a snow column.
+        Medians read from a rollup are t-digest estimates; the rest is exact.
+        """
+        source = self.route(by, start, end)
+        start, end = _as_datetime(start), _as_datetime(end)
+        if source == "raw":
+            result = self._query_raw(by, start, end)
+        else:
+            result = self._query_rollup(source, by, start, end)
+
+        outputs = []
+        for c in self.value_columns:
+            outputs.append((pl.col(f"{c}_sum") / pl.col(f"{c}_count")).alias(f"{c}_mean"))
+        if self.snow_column is not None:
+            outputs.append(
+                (pl.col("snow_hours") / pl.col("weather_hours")).alias("snow_fraction")
+            )
+        result = result.with_columns(outputs)
+        if by is not None:
+            result = result.sort(by)
+        return result.drop("snow_hours", "weather_hours", strict=False)
+
+    def _time_filter(self, column, start, end, as_date):
+        predicate = pl.lit(True)
+        if start is not None:
+            predicate &= pl.col(column) >= (start.date() if as_date else start)
+        if end is not None:
+            predicate &= pl.col(column) < (end.date() if as_date else end)
+        return predicate
+
+    def _query_raw(self, by, start, end):
+        t = pl.col(self.time_column)
+        groupings = {
+            "year": t.dt.year(),
+            "month": t.dt.truncate("1mo").dt.date(),
+            "day": t.dt.date(),
+            "hour": t.dt.hour(),
+        }
+        aggs = []
+        for c in self.value_columns:
+            values = pl.col(c).cast(pl.Float64)
+            aggs += [
+                values.count().alias(f"{c}_count"),
+                values.sum().alias(f"{c}_sum"),
+                values.min().alias(f"{c}_min"),
+                values.max().alias(f"{c}_max"),
+                values.median().alias(f"{c}_median"),
+            ]
+        if self.snow_column is not None:
+            weather = pl.col(self.snow_column)
+            aggs += [
+                weather.str.contains("Snow").sum().cast(pl.Int64).alias("snow_hours"),
+                weather.count().alias("weather_hours"),
+            ]
+        lf = self.raw.filter(self._time_filter(self.time_column, start, end, as_date=False))
+        if by is None:
+            return lf.select(aggs).collect()
+        return lf.group_by(groupings[by].alias(by)).agg(aggs).collect()
+
+    def _query_rollup(self, name, by, start, end):
+        keys = _LEVELS[name][0]
+        time_key = keys[0]
+        groupings = {
+            "year": pl.col(time_key).dt.year(),
+            "month": pl.col(time_key).dt.truncate("1mo"),
+            "day": pl.col(time_key),
+            "hour": pl.col("hour"),
+        }
+        table = self.tables[name].filter(self._time_filter(time_key, start, end, as_date=True))
+        if by is None:
+            merged = table.group_by(pl.lit(0).alias("_all")).agg(self._merge_aggs())
+            merged = merged.drop("_all")
+        else:
+            merged = table.group_by(groupings[by].alias(by)).agg(self._merge_aggs())
+
+        medians = []
+        for c in self.value_columns:
+            medians.append(
+                pl.Series(
+                    f"{c}_median",
+                    [
+                        float(
+                            TDigest.from_centroids(
+                                m.to_numpy(), w.to_numpy(), self.compression
+                            ).median()
+                        )
+                        if m is not None
+                        else None
+                        for m, w in zip(merged[f"{c}_means"], merged[f"{c}_weights"])
+                    ],
+                    dtype=pl.Float64,
+                )
+            )
+        centroids = [f"{c}_{part}" for c in self.value_columns for part in ("means", "weights")]
+        return merged.with_columns(medians).drop(centroids)
+
+    def write(self, directory):
+        """Store the rollup tables and the raw hours as Parquet files."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name, table in self.tables.items():
+            if table is not None:
+                table.write_parquet(directory / f"{name}.parquet")
+        self.raw.sink_parquet(directory / "raw.parquet")
+
+    @classmethod
+    def read(cls, directory, time_column="date_time", value_columns=("temperature_c",),
+             snow_column="weather", compression=100):
+        directory = Path(directory)
+        rollups = cls(time_column, value_columns, snow_column, compression)
+        for name in _LEVELS:
+            path = directory / f"{name}.parquet"
+            if path.exists():
+                rollups.tables[name] = pl.read_parquet(path)
+        rollups._raw = pl.read_parquet(directory / "raw.parquet")
+        return rollups
+
+
+if __name__ == "__main__":
+    import time
+
+    weather = pl.read_csv("data/weather_2012.csv", try_parse_dates=True)
+    months = [
+        part
+        for _, part in weather.group_by(pl.col("date_time").dt.month(), maintain_order=True)
+    ]
+    rollups = WeatherRollups()
+    started = time.perf_counter()
+    for month in months:
+        rollups.append(month)
+    print(f"built rollups for {len(months)} months in {time.perf_counter() - started:.3f}s")
+
+    for by, start, end in [
+        ("hour", None, None),
+        ("month", None, None),
+        ("month", "2012-03-01", "2012-06-01"),
+        ("day", "2012-03-01 06:00", "2012-03-03"),
+    ]:
+        source = rollups.route(by, start, end)
+        started = time.perf_counter()
+        result = rollups.query(by, start, end)
+        elapsed = time.perf_counter() - started
+        print(f"by={by} start={start} end={end}: {source}, {elapsed * 1000:.1f} ms")
+        print(result.head(3))
@@ -0,0 +1,98 @@
+"""Approximate streaming summaries that fit in constant memory.
+
+``SpaceSaving`` keeps the heavy hitters (most frequent values) of a stream.
+Its state is a small DataFrame, so updating it with a batch and merging two
+sketches are both a single vectorised join.
+"""
+
+import polars as pl
+
+_SCHEMA = {"value": pl.Utf8, "count": pl.UInt64, "error": pl.UInt64}
+
+
+class SpaceSaving:
+    """Space-Saving heavy-hitters sketch over string values.
+
+    Each tracked value has an overestimated ``count`` and an ``error`` such
+    that its true frequency lies in ``[count - error, count]``. Any value whose
+    true frequency exceeds ``n / capacity`` is guaranteed to be tracked.
+
+    Two sketches with the same capacity built on disjoint parts of a stream
+    (other partitions, other processes) can be combined with ``merge``.
+    """
+
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self.n = 0
+        self.state = pl.DataFrame(schema=_SCHEMA)
+
+    def update(self, values):
+        """Add a batch of values (a Series or a list)."""
+        values = pl.Series("value", values, dtype=pl.Utf8).drop_nulls()
+        batch = (
+            values.value_counts(name="count")
+            .with_columns(pl.col("count").cast(pl.UInt64), error=pl.lit(0, pl.UInt64))
+        )
+        self._combine(batch, batch_floor=0, batch_n=len(values))
+        return self
+
+    def merge(self, other):
+        """Fold another sketch into this one."""
+        self._combine(other.state, batch_floor=other.floor, batch_n=other.n)
+        return self
+
+    @property
+    def floor(self):
+        """Upper bound on the count of any value that is not tracked."""
+        if self.state.height < self.capacity:
+            return 0
+        return self.state["count"].min()
+
+    def top_k(self, k=10):
+        """The ``k`` most frequent values with their error bounds, ties by value."""
+        return (
+            self.state.sort(["count", "value"], descending=[True, False])
+            .head(k)
+            .with_columns(lower_bound=pl.col("count") - pl.col("error"))
+        )
+
+    def write(self, path):
+        """Store the sketch, with its ``n`` and ``capacity``, as an IPC file."""
+        state = self.state
+        if state.is_empty():
+            # A placeholder row carries n and capacity; no real value is null
+            state = pl.DataFrame({"value": [None], "count": [0], "error": [0]}, schema=_SCHEMA)
+        state.with_columns(
+            n=pl.lit(self.n, pl.UInt64), capacity=pl.lit(self.capacity, pl.UInt64)
+        ).write_ipc(path)
+
+    @classmethod
+    def read(cls, path, capacity=100):
+        """Load a sketch saved by ``write``.
+
+        ``capacity`` is only used for files written before the capacity was
+        stored with the sketch.
+        """
+        state = pl.read_ipc(path)
+        if "capacity" in state.columns and state.height:
+            capacity = state["capacity"][0]
+        sketch = cls(capacity)
+        sketch.n = state["n"][0] if state.height else 0
+        sketch.state = state.filter(pl.col("value").is_not_null()).select(list(_SCHEMA))
+        return sketch
+
+    def _combine(self, other, batch_floor, batch_n):
+        # Values missing from one side may have been seen up to that side's
+        # floor times, so the floor is added to both their count and error.
+        own_floor = self.floor
+        combined = self.state.join(
+            other, on="value", how="full", coalesce=True, suffix="_other"
+        ).select(
+            "value",
+            count=pl.col("count").fill_null(own_floor)
+            + pl.col("count_other").fill_null(batch_floor),
+            error=pl.col("error").fill_null(own_floor)
+            + pl.col("error_other").fill_null(batch_floor),
+        )
+        self.state = combined.sort("count", descending=True).head(self.capacity)
+        self.n += batch_n
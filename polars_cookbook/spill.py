@@ -0,0 +1,169 @@
+"""Concatenate many monthly frames through a file instead of memory.
+
+``pl.concat(pl_data_by_month)`` in CH5.py needs every month in memory at
+once. That is fine for one station-year but not for decades of several
+stations. ``ConcatSink`` appends each month to a single file as soon as the
+month is ready: one row group for Parquet, one record batch for Arrow IPC.
+It then returns a LazyFrame over the file, so peak memory is about one
+month plus the writer's buffers.
+
+Arrow (pyarrow) does the incremental writing. Polars hands each month over
+without copying the data.
+
+Run ``python -m polars_cookbook.spill`` to compare peak memory against
+``pl.concat`` on synthetic months.
+"""
+
+from pathlib import Path
+
+import polars as pl
+
+FORMATS = ("parquet", "ipc")
+
+
+class ConcatSink:
+    """Appends frames with the same columns to one Parquet or IPC file.
+
+    Example:
+        with ConcatSink("data/pl_weather_2012.parquet") as sink:
+            for month in range(1, 13):
+                sink.write(download_weather_month_polars(2012, month))
+        pl_weather_2012 = sink.scan()
+
+    The first frame (or ``schema``, if given) fixes the column order and
+    dtypes. Later frames are cast to it, and a missing column is written as
+    nulls. A column the schema does not have raises ``ValueError``, just as
+    ``pl.concat`` would fail. Pass ``schema`` when the first month may have
+    an all-null (``pl.Null``) column that later months fill in.
+    """
+
+    def __init__(self, path, format=None, schema=None, compression="zstd"):
+        self.path = Path(path)
+        self.format = format or ("ipc" if self.path.suffix in (".arrow", ".ipc") else "parquet")
+        if self.format not in FORMATS:
+            raise ValueError(f"format must be one of {FORMATS}, not {self.format!r}")
+        self.schema = pl.Schema(schema) if schema is not None else None
+        self.compression = compression
+        self.rows = 0
+        self.batches = 0
+        self._writer = None
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _conform(self, df):
+        extra = [c for c in df.columns if c not in self.schema]
+        if extra:
+            raise ValueError(f"columns not in the sink's schema: {extra}")
+        return df.select(
+            pl.col(name).cast(dtype) if name in df.columns else pl.lit(None, dtype).alias(name)
+            for name, dtype in self.schema.items()
+        )
+
+    def _open(self, table_schema):
+        import pyarrow.ipc
+        import pyarrow.parquet
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.format == "parquet":
+            return pyarrow.parquet.ParquetWriter(
+                self.path, table_schema, compression=self.compression
+            )
+        options = pyarrow.ipc.IpcWriteOptions(compression=self.compression)
+        return pyarrow.ipc.new_file(self.path, table_schema, options=options)
+
+    def write(self, df):
+        """Append ``df`` as one row group (Parquet) or record batch (IPC)."""
+        if self._closed:
+            raise ValueError(f"{self.path} is closed")
+        if self.schema is None:
+            self.schema = df.schema
+        table = self._conform(df).to_arrow()
+        if self._writer is None:
+            self._writer = self._open(table.schema)
+        if self.format == "parquet":
+            self._writer.write_table(table, row_group_size=max(table.num_rows, 1))
+        else:
+            for batch in table.to_batches(max_chunksize=max(table.num_rows, 1)):
+                self._writer.write_batch(batch)
+        self.rows += df.height
+        self.batches += 1
+        return self
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer is None and self.schema is not None:
+            # Nothing was written but the schema is known: leave an empty file
+            self._writer = self._open(pl.DataFrame(schema=self.schema).to_arrow().schema)
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def scan(self):
+        """A LazyFrame over everything written so far (closes the writer)."""
+        self.close()
+        if self.format == "parquet":
+            return pl.scan_parquet(self.path)
+        return pl.scan_ipc(self.path)
+
+
+def concat_to_disk(frames, path, format=None, schema=None):
+    """``pl.concat(frames)`` through ``path``; returns a LazyFrame.
+
+    ``frames`` can be a generator, so only one frame needs to exist at a time.
+    """
+    with ConcatSink(path, format, schema) as sink:
+        for df in frames:
+            sink.write(df)
+    return sink.scan()
+
+
+def _synthetic_months(n_months, rows_per_month=50_000):
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    for month in range(n_months):
+        yield pl.DataFrame(
+            {
+                "month": pl.Series([month] * rows_per_month, dtype=pl.Int32),
+                "temperature_c": rng.normal(5, 10, rows_per_month),
+                "weather": rng.choice(["Clear", "Snow", "Rain,Fog"], rows_per_month),
+            }
+        )
+
+
+def _peak_rss(mode, n_months, path):
+    from polars_cookbook.profiling import peak_rss_mb
+
+    if mode == "memory":
+        total = pl.concat(list(_synthetic_months(n_months))).select(pl.len()).item()
+    else:
+        lf = concat_to_disk(_synthetic_months(n_months), path)
+        total = lf.select(pl.len()).collect().item()
+    return total, peak_rss_mb()
+
+
+def benchmark(n_months=120):
+    """Peak RSS (MB) of ``pl.concat`` vs ``ConcatSink``, each in a fresh process."""
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in ("memory", "disk"):
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                total, peak_mb = pool.submit(
+                    _peak_rss, mode, n_months, Path(directory) / "months.parquet"
+                ).result()
+            rows.append({"mode": mode, "months": n_months, "rows": total, "peak_rss_mb": peak_mb})
+    return pl.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    print(benchmark())
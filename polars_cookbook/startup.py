@@ -0,0 +1,160 @@
+"""Keeping the chapter scripts and batch pipelines quick to start.
+
+matplotlib.pyplot takes about 0.9s to import and pandas about 0.5s, while
+Polars itself takes about 0.2s. The chapter scripts used to import both up
+front (CH5.py also styled pyplot at import), even though pandas only
+appears in the commented-out originals and a batch run that only writes
+data never plots. ``pyplot()`` returns a stand-in that imports and styles
+matplotlib on the first plotting call. With ``COOKBOOK_HEADLESS=1`` in the
+environment, plotting calls do nothing and matplotlib is never imported.
+
+``python -m polars_cookbook.startup`` is the regression check. It imports
+each entry point in a fresh ``python -X importtime`` process, fails if one
+of ``HEAVY_MODULES`` is imported or the import takes longer than the
+budget, and prints the slowest modules.
+"""
+
+import ast
+import importlib
+import os
+import subprocess
+import sys
+
+import polars as pl
+
+# Modules that must only be imported when they are actually used
+HEAVY_MODULES = ("pandas", "matplotlib", "pyarrow", "requests")
+
+# name -> (Python statement or chapter script whose imports are checked,
+#          heavy modules it legitimately needs at startup)
+ENTRY_POINTS = {
+    "package": ("import polars_cookbook", ()),
+    "weather pipeline": ("import polars_cookbook.weather_pipeline", ()),
+    "311 feed": ("import polars_cookbook.feed311", ()),
+    "CH1.py": ("CH1.py", ()),
+    "CH2-3.py": ("CH2-3.py", ()),
+    # Downloads March 2012 with requests.get as the chapter's first step
+    "CH5.py": ("CH5.py", ("requests",)),
+}
+
+BUDGET_S = 0.75
+
+
+class LazyModule:
+    """Stands in for a module and imports it on first attribute access.
+
+    ``setup`` is called once with the real module right after the import,
+    e.g. to apply a matplotlib style.
+    """
+
+    def __init__(self, name, setup=None):
+        self._name = name
+        self._setup = setup
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+            if self._setup is not None:
+                self._setup(self._module)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+
+class _NoPlots:
+    """pyplot for headless runs: every call is accepted and ignored."""
+
+    def __getattr__(self, attr):
+        return lambda *args, **kwargs: None
+
+
+def pyplot(setup=None):
+    """``matplotlib.pyplot``, imported (and ``setup`` applied) on first use."""
+    if os.environ.get("COOKBOOK_HEADLESS"):
+        return _NoPlots()
+    return LazyModule("matplotlib.pyplot", setup)
+
+
+def script_imports(path):
+    """The top-level import statements of a script, as one block of source."""
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    tree = ast.parse(source)
+    return "\n".join(
+        ast.get_source_segment(source, node)
+        for node in tree.body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+    )
+
+
+def import_times(statement, cwd=None):
+    """Per-module import times of ``statement`` in a fresh interpreter.
+
+    Returns a frame with module, depth (0 for modules imported directly),
+    self_s and cumulative_s, in import order.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        cwd=cwd,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{statement!r} failed:\n{result.stderr}")
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        rows.append(
+            {
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+                "self_s": int(own) / 1e6,
+                "cumulative_s": int(cumulative) / 1e6,
+            }
+        )
+    return pl.DataFrame(
+        rows,
+        schema={"module": pl.String, "depth": pl.Int64, "self_s": pl.Float64,
+                "cumulative_s": pl.Float64},
+    )
+
+
+def check_startup(entry_points=None, budget_s=BUDGET_S, heavy=HEAVY_MODULES, cwd="."):
+    """One row per entry point: total import time, heavy modules pulled in, ok."""
+    rows = []
+    for name, (target, allowed) in (entry_points or ENTRY_POINTS).items():
+        statement = script_imports(os.path.join(cwd, target)) if target.endswith(".py") else target
+        times = import_times(statement, cwd=cwd)
+        top_level = times["module"].str.split(".").list.first()
+        unwanted = [module for module in heavy if module not in allowed]
+        heavy_found = sorted(set(top_level.filter(top_level.is_in(unwanted))))
+        total = times.filter(pl.col("depth") == 0)["cumulative_s"].sum()
+        rows.append(
+            {
+                "entry_point": name,
+                "import_s": total,
+                "heavy_modules": heavy_found,
+                "slowest": times.sort("self_s", descending=True)["module"].head(3).to_list(),
+                "ok": total <= budget_s and not heavy_found,
+            }
+        )
+    return pl.DataFrame(
+        rows,
+        schema={"entry_point": pl.String, "import_s": pl.Float64,
+                "heavy_modules": pl.List(pl.String), "slowest": pl.List(pl.String),
+                "ok": pl.Boolean},
+    )
+
+
+if __name__ == "__main__":
+    budget = float(sys.argv[1]) if len(sys.argv) > 1 else BUDGET_S
+    report = check_startup(budget_s=budget)
+    with pl.Config(tbl_rows=-1, fmt_str_lengths=80, fmt_table_cell_list_len=5):
+        print(report)
+    if not report["ok"].all():
+        sys.exit(f"startup regression: import budget {budget}s or heavy import exceeded")
@@ -0,0 +1,80 @@
+"""Sorted time index over hourly weather frames.
+
+The weather frames are ordered by their timestamp column, so a time window
+is a contiguous slice. ``TimeIndexedFrame`` finds the slice bounds with a
+binary search (``search_sorted``) instead of a full-scan ``filter``.
+"""
+
+from datetime import date, datetime
+
+import polars as pl
+
+
+def _as_datetime(value):
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day)
+    return value
+
+
+class TimeIndexedFrame:
+    """A DataFrame sorted on a datetime column, with O(log n) range lookups.
+
+    Example:
+        weather = TimeIndexedFrame(pl_weather_2012, "date_time")
+        march = weather.window("2012-03-01", "2012-04-01")
+        weather.asof("2012-03-21 14:37")
+    """
+
+    def __init__(self, df, column="date_time"):
+        if not df[column].is_sorted():
+            df = df.sort(column)
+        self.df = df.with_columns(pl.col(column).set_sorted())
+        self.column = column
+
+    def __len__(self):
+        return self.df.height
+
+    def _position(self, value, side="left"):
+        return self.df[self.column].search_sorted(_as_datetime(value), side=side)
+
+    def window(self, start=None, end=None):
+        """Rows with ``start <= timestamp < end``; either bound may be None."""
+        lo = 0 if start is None else self._position(start)
+        hi = self.df.height if end is None else self._position(end)
+        return self.df.slice(lo, max(hi - lo, 0))
+
+    def asof(self, timestamp, strategy="nearest"):
+        """The single reading closest to ``timestamp``.
+
+        ``strategy`` is "backward" (last reading at or before), "forward"
+        (first reading at or after) or "nearest", as in ``join_asof``.
+        """
+        timestamp = _as_datetime(timestamp)
+        times = self.df[self.column]
+        after = self._position(timestamp)
+        before = self._position(timestamp, side="right") - 1
+        if strategy == "backward":
+            index = before
+        elif strategy == "forward":
+            index = after
+        elif strategy == "nearest":
+            candidates = [i for i in (before, after) if 0 <= i < self.df.height]
+            index = min(candidates, key=lambda i: abs(times[i] - timestamp), default=-1)
+        else:
+            raise ValueError(f"unknown strategy: {strategy!r}")
+        if not 0 <= index < self.df.height:
+            return self.df.clear()
+        return self.df.slice(index, 1)
+
+    def join_onto(self, events, on, strategy="nearest", tolerance="1h"):
+        """Attach the nearest reading to every row of ``events`` (``join_asof``)."""
+        events = events.sort(on)
+        return events.join_asof(
+            self.df,
+            left_on=on,
+            right_on=self.column,
+            strategy=strategy,
+            tolerance=tolerance,
+        )
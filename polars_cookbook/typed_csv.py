@@ -0,0 +1,166 @@
+"""Two-phase CSV loading with narrow dtypes inferred from a sample.
+
+Phase one reads a sample of the file as strings and profiles it to pick
+the narrowest safe dtype per column (u8/u16/..., f32, Categorical, Date).
+Columns named like identifiers (``climate_id``, "Station ID", "Incident
+Zip") and digits written with a leading zero stay strings: they are labels,
+and another export may put letters or a leading 0 in them.
+Phase two reads the whole file with that schema fixed. If a value outside
+the sample does not fit, the narrowed columns are widened once and the file
+is re-read.
+"""
+
+import io
+import os
+import re
+
+import polars as pl
+
+from polars_cookbook.frame_profile import profile_frame
+
+# Digits a float32 represents exactly when printed back
+FLOAT32_DIGITS = 6
+
+# Column names of labels that look numeric in a sample
+IDENTIFIER_NAME = re.compile(r"(?:^|[^a-z])(?:id|zip)$", re.IGNORECASE)
+
+_DTYPES = {
+    "UInt8": pl.UInt8, "UInt16": pl.UInt16, "UInt32": pl.UInt32, "UInt64": pl.UInt64,
+    "Int8": pl.Int8, "Int16": pl.Int16, "Int32": pl.Int32, "Int64": pl.Int64,
+    "Float64": pl.Float64, "Categorical": pl.Categorical, "Date": pl.Date,
+    "Datetime": pl.Datetime, "String": pl.String,
+}
+
+
+def sample_csv(path, sample_rows=10_000, ranges=4, encoding="utf8", **read_kwargs):
+    """Read ``sample_rows`` rows as strings, spread over ``ranges`` byte ranges.
+
+    Taking rows from several places in the file catches values that only
+    appear later (e.g. a counter going over 65535 in the summer).
+    """
+    size = os.path.getsize(path)
+    per_range = max(sample_rows // ranges, 1)
+    with open(path, "rb") as f:
+        header = f.readline()
+        lines = []
+        for i in range(ranges):
+            offset = len(header) + (size - len(header)) * i // ranges
+            f.seek(offset)
+            if i:
+                f.readline()  # skip to the next full line
+            for _ in range(per_range):
+                line = f.readline()
+                if not line:
+                    break
+                lines.append(line if line.endswith(b"\n") else line + b"\n")
+    data = header + b"".join(lines)
+    if encoding not in ("utf8", "utf-8"):
+        data = data.decode(encoding).encode()
+    return pl.read_csv(io.BytesIO(data), infer_schema_length=0, **read_kwargs)
+
+
+def _fits_float32(sample, column):
+    digits = (
+        sample[column]
+        .str.replace_all(r"[-+.]|e.*$", "")
+        .str.strip_chars_start("0")
+        .str.len_chars()
+        .max()
+    )
+    return digits is not None and digits <= FLOAT32_DIGITS
+
+
+def _is_label(sample, column):
+    if IDENTIFIER_NAME.search(column):
+        return True
+    return sample[column].str.contains(r"^0\d").any()
+
+
+def infer_csv_schema(path, sample_rows=10_000, ranges=4, encoding="utf8",
+                     **read_kwargs):
+    """Narrowest dtype per column according to a sample of ``path``."""
+    sample = sample_csv(path, sample_rows, ranges, encoding=encoding, **read_kwargs)
+    schema = {}
+    for record in profile_frame(sample).iter_rows(named=True):
+        dtype = _DTYPES.get(record["suggested_dtype"], pl.String)
+        if dtype.is_numeric() and _is_label(sample, record["column"]):
+            dtype = pl.String
+        elif dtype == pl.Float64 and _fits_float32(sample, record["column"]):
+            dtype = pl.Float32
+        schema[record["column"]] = dtype
+    return schema
+
+
+def widen(schema):
+    """The one-off fallback: 64-bit numbers, parsed dates become strings."""
+    wide = {}
+    for name, dtype in schema.items():
+        if dtype.is_integer():
+            wide[name] = pl.Int64
+        elif dtype.is_float():
+            wide[name] = pl.Float64
+        elif dtype in (pl.Date, pl.Datetime):
+            wide[name] = pl.String
+        else:
+            wide[name] = dtype
+    return wide
+
+
+def _read(path, schema, encoding, read_kwargs):
+    # Dates are read as strings and parsed afterwards, so any format the
+    # sample parsed is accepted, not just ISO 8601
+    temporal = {n: d for n, d in schema.items() if d in (pl.Date, pl.Datetime)}
+    read_schema = {n: pl.String if n in temporal else d for n, d in schema.items()}
+    df = pl.read_csv(path, schema=read_schema, encoding=encoding, **read_kwargs)
+    return df.with_columns(
+        pl.col(n).str.to_date() if d == pl.Date else pl.col(n).str.to_datetime()
+        for n, d in temporal.items()
+    )
+
+
+def read_csv_typed(path, sample_rows=10_000, ranges=4, encoding="utf8",
+                   schema_overrides=None, **read_kwargs):
+    """Read ``path`` with a schema inferred from a sample.
+
+    ``schema_overrides`` pins dtypes for some columns (e.g. keep
+    "Incident Zip" as a string). Other keyword arguments go to
+    ``pl.read_csv``.
+
+    Example:
+        pl_complaints = read_csv_typed(
+            "data/311-service-requests.csv",
+            null_values=["N/A"],
+            schema_overrides={"Incident Zip": pl.Utf8},
+        )
+    """
+    schema = infer_csv_schema(
+        path, sample_rows, ranges, encoding=encoding, **read_kwargs
+    )
+    schema.update(schema_overrides or {})
+    try:
+        return _read(path, schema, encoding, read_kwargs)
+    except (pl.exceptions.ComputeError, pl.exceptions.InvalidOperationError):
+        pass
+    wide = widen(schema)
+    wide.update(schema_overrides or {})
+    try:
+        return _read(path, wide, encoding, read_kwargs)
+    except (pl.exceptions.ComputeError, pl.exceptions.InvalidOperationError):
+        return _read_tolerant(path, wide, encoding, read_kwargs)
+
+
+def _read_tolerant(path, schema, encoding, read_kwargs):
+    """Last resort: read everything as text and keep each column as a string
+    if it has a value its dtype cannot parse (e.g. "abc" in a number column).
+    """
+    df = pl.read_csv(
+        path, schema={n: pl.String for n in schema}, encoding=encoding, **read_kwargs
+    )
+    columns = []
+    for name, dtype in schema.items():
+        if dtype == pl.String:
+            continue
+        parsed = df[name].cast(dtype, strict=False)
+        if parsed.null_count() == df[name].null_count():
+            columns.append(parsed)
+    return df.with_columns(columns)
@@ -0,0 +1,291 @@
+"""Asynchronous download pipeline for the monthly weather CSVs.
+
+CH5.py fetches a month, parses it, cleans it, and only then moves to the
+next month. Nothing is written until all twelve months are concatenated.
+Here every stage is its own asyncio task and stages are linked by bounded
+queues. Fetching month N+1 overlaps with parsing and cleaning month N and
+writing month N-1, so the wall time approaches that of the slowest stage
+rather than the sum of all of them. A full queue blocks the stage that
+feeds it, which is the backpressure.
+
+Blocking work (HTTP, CSV parsing, writing) runs in worker threads via
+``asyncio.to_thread``; Polars and socket I/O release the GIL.
+
+Run ``python -m polars_cookbook.weather_pipeline`` to compare the
+sequential and pipelined runs against a local mock server with injected
+latency.
+"""
+
+import asyncio
+import codecs
+import gzip
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import polars as pl
+
+from polars_cookbook.download import fetch_bytes
+from polars_cookbook.headers import read_weather_csv
+
+URL_TEMPLATE = (
+    "{base_url}/climate_data/bulk_data_e.html?format=csv&stationID={station}"
+    "&Year={year}&Month={month}&timeframe=1&submit=Download+Data"
+)
+BASE_URL = "http://climate.weather.gc.ca"
+STATION_ID = 5415
+
+_DONE = object()
+
+
+def month_url(year, month, station=STATION_ID, base_url=BASE_URL):
+    return URL_TEMPLATE.format(base_url=base_url, station=station, year=year, month=month)
+
+
+def fetch_month(year, month, station=STATION_ID, base_url=BASE_URL, session=None):
+    body, _ = fetch_bytes(month_url(year, month, station, base_url), session)
+    return body
+
+
+def parse_month(raw):
+    df = read_weather_csv(raw)
+    return df.with_columns(
+        pl.col("date_time_lst").str.strptime(pl.Datetime, "%Y-%m-%d %H:%M")
+    )
+
+
+def clean_month(df):
+    """Drop the columns with a null or empty string, and the split date parts.
+
+    This is the cleaning of CH5.py, which calls it from ``clean_data_polars``.
+    """
+    # Null and empty-string counts for every column in one select
+    missing = df.select(
+        (
+            pl.col(name).null_count() + (pl.col(name) == "").sum()
+            if dtype == pl.String
+            else pl.col(name).null_count()
+        ).alias(name)
+        for name, dtype in df.schema.items()
+    )
+    complete = [name for name, count in zip(missing.columns, missing.row(0)) if count == 0]
+    return df.select(complete).drop(["year", "month", "day", "time_lst"], strict=False)
+
+
+def write_month(df, out_dir, year, month):
+    path = Path(out_dir) / f"weather_{year}_{month:02d}.parquet"
+    df.write_parquet(path)
+    return path
+
+
+async def _worker(name, func, inbox, outbox, timings):
+    while (item := await inbox.get()) is not _DONE:
+        key, value = item
+        started = time.perf_counter()
+        result = await asyncio.to_thread(func, key, value)
+        timings.append((name, key, time.perf_counter() - started))
+        await outbox.put((key, result))
+
+
+async def _stage(name, func, inbox, outbox, timings, workers=1):
+    # Each worker stops at its own end marker; downstream gets a single one
+    await asyncio.gather(
+        *[_worker(name, func, inbox, outbox, timings) for _ in range(workers)]
+    )
+    await outbox.put(_DONE)
+
+
+async def run_pipeline(keys, fetch, parse, clean, write, queue_size=2, fetch_workers=1):
+    """Run ``fetch -> parse -> clean -> write`` over ``keys`` with overlapping stages.
+
+    Every stage function takes ``(key, value)`` (``fetch`` gets ``(key, None)``).
+    ``fetch_workers`` > 1 keeps several downloads in flight; later stages may
+    then see keys out of order. Returns the results of ``write`` in key order
+    and the per-stage timings.
+    """
+    queues = [asyncio.Queue(maxsize=queue_size) for _ in range(5)]
+    timings = []
+    stages = [
+        _stage("fetch", fetch, queues[0], queues[1], timings, workers=fetch_workers),
+        _stage("parse", parse, queues[1], queues[2], timings),
+        _stage("clean", clean, queues[2], queues[3], timings),
+        _stage("write", write, queues[3], queues[4], timings),
+    ]
+
+    async def feed():
+        for key in keys:
+            await queues[0].put((key, None))
+        for _ in range(fetch_workers):
+            await queues[0].put(_DONE)
+
+    async def drain():
+        results = {}
+        while (item := await queues[4].get()) is not _DONE:
+            results[item[0]] = item[1]
+        return results
+
+    *_, results = await asyncio.gather(feed(), *stages, drain())
+    return [results[key] for key in keys], timings
+
+
+def download_year(year, out_dir, station=STATION_ID, base_url=BASE_URL, queue_size=2,
+                  fetch_workers=1):
+    """Download, clean and write the twelve months of ``year`` as Parquet files.
+
+    Returns a LazyFrame over the written files and the per-stage timings.
+    """
+    import requests
+
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    # requests.Session is not thread-safe: one per fetch thread
+    local = threading.local()
+    sessions = []
+
+    def fetch(month, _):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+            sessions.append(local.session)
+        return fetch_month(year, month, station, base_url, local.session)
+
+    try:
+        paths, timings = asyncio.run(
+            run_pipeline(
+                range(1, 13),
+                fetch=fetch,
+                parse=lambda month, raw: parse_month(raw),
+                clean=lambda month, df: clean_month(df),
+                write=lambda month, df: write_month(df, out_dir, year, month),
+                queue_size=queue_size,
+                fetch_workers=fetch_workers,
+            )
+        )
+    finally:
+        for session in sessions:
+            session.close()
+    return pl.scan_parquet(paths), pl.DataFrame(
+        timings, schema=["stage", "month", "seconds"], orient="row"
+    )
+
+
+def download_year_sequential(year, out_dir, station=STATION_ID, base_url=BASE_URL):
+    """The CH5.py order of work, for comparison."""
+    import requests
+
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    session = requests.Session()
+    paths = []
+    for month in range(1, 13):
+        df = clean_month(parse_month(fetch_month(year, month, station, base_url, session)))
+        paths.append(write_month(df, out_dir, year, month))
+    return pl.scan_parquet(paths)
+
+
+def _raw_month_csv(weather, year, month):
+    """A month of ``weather_2012.csv`` in the layout of the upstream export."""
+    month_df = weather.filter(
+        (pl.col("date_time").dt.year() == year) & (pl.col("date_time").dt.month() == month)
+    )
+    raw = month_df.select(
+        pl.col("longitude").alias("Longitude (x)"),
+        pl.col("latitude").alias("Latitude (y)"),
+        pl.col("station_name").alias("Station Name"),
+        pl.col("climate_id").alias("Climate ID"),
+        pl.col("date_time").dt.strftime("%Y-%m-%d %H:%M").alias("Date/Time (LST)"),
+        pl.col("date_time").dt.year().alias("Year"),
+        pl.col("date_time").dt.month().alias("Month"),
+        pl.col("date_time").dt.day().alias("Day"),
+        pl.col("date_time").dt.strftime("%H:%M").alias("Time (LST)"),
+        pl.col("temperature_c").alias("Temp (°C)"),
+        pl.lit(None, pl.String).alias("Temp Flag"),
+        pl.col("dew_point_temp_c").alias("Dew Point Temp (°C)"),
+        pl.col("relative_humidity").alias("Rel Hum (%)"),
+        pl.col("wind_speed_kmh").alias("Wind Spd (km/h)"),
+        pl.col("visibility_km").alias("Visibility (km)"),
+        pl.col("station_pressure_kpa").alias("Stn Press (kPa)"),
+        pl.col("weather").alias("Weather"),
+    )
+    return codecs.BOM_UTF8 + raw.write_csv(quote_style="always").encode()
+
+
+@contextmanager
+def mock_weather_server(latency=0.2, source="data/weather_2012.csv", compress=True):
+    """Serve ``source`` month by month like climate.weather.gc.ca, slowly.
+
+    Yields the base URL to pass as ``base_url``. Every response is delayed by
+    ``latency`` seconds, and gzipped when the client accepts it and
+    ``compress`` is on.
+    """
+    weather = pl.read_csv(source, try_parse_dates=True)
+    months = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)
+            key = int(query["Year"][0]), int(query["Month"][0])
+            if key not in months:
+                months[key] = _raw_month_csv(weather, *key)
+            time.sleep(latency)
+            body = months[key]
+            self.send_response(200)
+            if compress and "gzip" in self.headers.get("Accept-Encoding", ""):
+                body = gzip.compress(body)
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Type", "text/csv")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def benchmark(latency=0.3, year=2012):
+    """Wall time of the sequential and pipelined downloads against the mock server.
+
+    Raises AssertionError if a pipelined result differs from the sequential one.
+    """
+    import tempfile
+
+    rows = []
+    with mock_weather_server(latency=latency) as base_url, tempfile.TemporaryDirectory() as out:
+        started = time.perf_counter()
+        sequential = download_year_sequential(year, f"{out}/seq", base_url=base_url).collect()
+        rows.append({"run": "sequential", "seconds": time.perf_counter() - started})
+
+        for fetch_workers in (1, 4):
+            started = time.perf_counter()
+            lazy, _ = download_year(
+                year, f"{out}/async{fetch_workers}", base_url=base_url,
+                fetch_workers=fetch_workers,
+            )
+            pipelined = lazy.collect()
+            rows.append(
+                {
+                    "run": f"pipelined, {fetch_workers} fetch worker(s)",
+                    "seconds": time.perf_counter() - started,
+                }
+            )
+            assert pipelined.equals(sequential), f"{rows[-1]['run']} differs from sequential"
+    report = pl.DataFrame(rows)
+    return report.with_columns(speedup=report["seconds"][0] / pl.col("seconds"))
+
+
+if __name__ == "__main__":
+    report = benchmark()
+    print(report)
+    # Overlapping the stages has to beat doing them one after another
+    slower = report.filter(pl.col("run") != "sequential", pl.col("speedup") <= 1)
+    if not slower.is_empty():
+        raise SystemExit(f"pipelining was not faster:\n{slower}")
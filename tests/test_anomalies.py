@@ -0,0 +1,71 @@
+from datetime import date
+
+import numpy as np
+import polars as pl
+
+from polars_cookbook.anomalies import OnlineAnomalyDetector, rolling_anomalies
+
+
+def _daily(values):
+    return pl.DataFrame(
+        {
+            "Date": pl.date_range(
+                date(2012, 1, 1), date(2012, 1, len(values)), eager=True
+            ),
+            "count": pl.Series(values, dtype=pl.Float64),
+        }
+    )
+
+
+def test_constant_series_is_never_flagged():
+    df = _daily([5.0] * 30)
+
+    rolling = rolling_anomalies(df, "Date", "28d")
+    online = OnlineAnomalyDetector(["count"], window=28).update(df)
+
+    assert not rolling["count_anomaly"].any()
+    assert not online["count_anomaly"].any()
+    assert rolling["count_z"].null_count() == df.height
+    assert online["count_z"].null_count() == df.height
+
+
+def test_missing_readings_are_not_zeros_in_the_window():
+    values = [10.0, 11.0, 9.0, 10.0, 12.0, 8.0, 10.0, 11.0, 9.0, 10.0]
+    with_gap = _daily(values[:5] + [None] + values[5:])
+    without_gap = _daily(values)
+
+    scored = OnlineAnomalyDetector(["count"], window=28, min_samples=3).update(with_gap)
+    expected = OnlineAnomalyDetector(["count"], window=28, min_samples=3).update(without_gap)
+
+    assert scored["count_z"][5] is None
+    np.testing.assert_allclose(
+        scored["count_z"].drop_nulls().to_numpy(),
+        expected["count_z"].drop_nulls().to_numpy(),
+    )
+
+
+def test_online_scores_match_the_window_statistics():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=200).round(1)  # rounding makes ties in the sorted window
+    values[::17] = np.nan
+    window = 12
+
+    scored = OnlineAnomalyDetector(["count"], window=window, min_samples=2).update(
+        pl.DataFrame({"count": values})
+    )
+
+    seen, z, robust_z = [], [], []
+    for value in values:
+        current = np.array(seen[-window:])
+        if len(current) >= 2 and not np.isnan(value):
+            median = np.median(current)
+            mad = np.median(np.abs(current - median))
+            z.append((value - current.mean()) / current.std(ddof=1))
+            robust_z.append((value - median) / (1.4826 * mad) if mad > 0 else np.nan)
+        else:
+            z.append(np.nan)
+            robust_z.append(np.nan)
+        if not np.isnan(value):
+            seen.append(value)
+    np.testing.assert_allclose(scored["count_z"].fill_null(np.nan).to_numpy(), z)
+    np.testing.assert_allclose(scored["count_robust_z"].fill_null(np.nan).to_numpy(), robust_z)
@@ -0,0 +1,42 @@
+from polars_cookbook.feed311 import ComplaintFeedProcessor, process_feed, tail_file
+
+HEADER = b"Complaint Type,Borough,Descriptor\n"
+
+
+def test_tail_file_follows_a_growing_file(tmp_path):
+    path = tmp_path / "feed.csv"
+    path.write_bytes(HEADER + b"Noise - Street/Sidewalk,BROOKLYN,Loud Music\n")
+    processor = ComplaintFeedProcessor()
+    batches = tail_file(path, poll_interval=0.01)
+
+    processor.process_lines(next(batches))
+    assert processor.rows_seen == 1
+
+    with open(path, "ab") as f:
+        # A quoted newline, CRLF endings and a record split across writes
+        f.write(b'Blocked Driveway,QUEENS,"No Access\nat all"\r\nHeating,BRO')
+    processor.process_lines(next(batches))
+    with open(path, "ab") as f:
+        f.write(b"NX,Heat\n")
+    batch = processor.process_lines(next(batches))
+
+    assert processor.rows_seen == 3
+    assert batch["Borough"].to_list() == ["BRONX"]
+    counts = dict(processor.type_counts.iter_rows())
+    assert counts == {"Noise - Street/Sidewalk": 1, "Blocked Driveway": 1, "Heating": 1}
+
+
+def test_tail_file_yields_final_unterminated_record(tmp_path):
+    path = tmp_path / "feed.csv"
+    path.write_bytes(
+        HEADER
+        + b"Noise - Street/Sidewalk,BROOKLYN,Loud Music\r\n"
+        + b"Heating,BRONX,Heat\r\n"
+        + b"Noise - Street/Sidewalk,QUEENS,Loud Talking"
+    )
+
+    processor = process_feed(tail_file(path, stop_when_idle=True))
+
+    assert processor.rows_seen == 3
+    ratio = dict(processor.noise_ratio().iter_rows())
+    assert ratio == {"BRONX": 0.0, "BROOKLYN": 1.0, "QUEENS": 1.0}
@@ -0,0 +1,43 @@
+from datetime import datetime
+from pathlib import Path
+
+import polars as pl
+
+from polars_cookbook.manifest import CHAPTER_READERS, Manifest, Pipeline
+
+BIKES = Path(__file__).resolve().parent.parent / "data" / "bikes.csv"
+
+
+def test_bikes_reader_decodes_latin1_headers():
+    schema = CHAPTER_READERS["data/bikes.csv"](BIKES).collect_schema()
+
+    assert "Brébeuf (données non disponibles)" in schema.names()
+
+
+def test_partitioned_stage_sees_only_changed_partitions(tmp_path):
+    path = tmp_path / "hours.csv"
+    hours = pl.DataFrame({
+        "date_time": [datetime(2012, month, 1) for month in (1, 2, 3)],
+        "temperature_c": [-5.0, -2.0, 3.0],
+    })
+    hours.write_csv(path)
+    calls = []
+
+    def build():
+        pipeline = Pipeline(Manifest(
+            tmp_path / "manifest.json",
+            readers={path: lambda p: pl.scan_csv(p, try_parse_dates=True)},
+        ))
+        pipeline.add("monthly", lambda changed: calls.append(changed[str(path)]),
+                     inputs=[path], partitions={path: pl.col("date_time").dt.month()})
+        return pipeline
+
+    build().run()
+    build().run()
+    hours.with_columns(
+        pl.when(pl.col("date_time").dt.month() == 2).then(0.0).otherwise("temperature_c")
+        .alias("temperature_c")
+    ).write_csv(path)
+    build().run()
+
+    assert calls == [["1", "2", "3"], ["2"]]
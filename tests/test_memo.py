@@ -0,0 +1,42 @@
+import gc
+from datetime import date
+
+import polars as pl
+
+from polars_cookbook.memo import QueryCache, stable_fingerprint
+
+
+def test_stable_fingerprint_depends_only_on_values():
+    df = pl.DataFrame({
+        "day": [date(2012, 1, 1), None, date(2012, 1, 3)],
+        "count": [35, 83, None],
+        "name": ["ab", "c", None],
+    })
+
+    # Pinned: a Polars upgrade must not change stored fingerprints
+    assert stable_fingerprint(df) == "1a767c62628d4da88159d347ef07dcd8"
+    assert stable_fingerprint(pl.concat([df[:1], df[1:]], rechunk=False)) == stable_fingerprint(df)
+    assert stable_fingerprint(df.with_columns(name=pl.Series(["a", "bc", None]))) != (
+        stable_fingerprint(df)
+    )
+
+
+def test_repeated_queries_hash_the_frame_and_plan_once():
+    df = pl.DataFrame({"Complaint Type": ["Noise", "Heating", "Noise"]})
+    plans = []
+
+    def top(lf):
+        plans.append(lf)
+        return lf.group_by("Complaint Type").len().sort("len", descending=True)
+
+    cache = QueryCache()
+    results = [cache.collect(df, top) for _ in range(3)]
+
+    assert cache.hits == 2
+    assert all(result.equals(results[0]) for result in results)
+    # One plan built on the empty frame, one real run
+    assert len(plans) == 2
+    assert len(cache._fingerprints) == 1
+    del df, results
+    gc.collect()
+    assert cache._fingerprints == {}
@@ -0,0 +1,55 @@
+import polars as pl
+
+from polars_cookbook.popcon import (
+    TAGS,
+    read_popcon,
+    read_popcon_archive,
+    write_popcon_archive,
+)
+
+HEADER = "POPULARITY-CONTEST-0 TIME:1387269426 ID:0123456789abcdef ARCH:amd64 POPCONVER:1.61\n"
+FOOTER = "END-POPULARITY-CONTEST-0 TIME:1387269433\n"
+
+
+def _round_trip(tmp_path, body):
+    report = tmp_path / "popularity-contest"
+    report.write_text(HEADER + body + FOOTER)
+    header, frame = read_popcon(report)
+    write_popcon_archive(tmp_path / "report.npz", header, frame)
+    return frame, read_popcon_archive(tmp_path / "report.npz")
+
+
+def test_round_trip_when_every_package_has_no_files(tmp_path):
+    frame, (header, restored) = _round_trip(
+        tmp_path,
+        "1387200000 1387100000 libfoo <NOFILES>\n"
+        "1387200100 1387100000 libbar <NOFILES>\n",
+    )
+
+    assert header["TIME"] == 1387269426
+    assert restored["package-name"].to_list() == ["libfoo", "libbar"]
+    assert restored["<NOFILES>"].all()
+    assert restored["mru-name"].null_count() == frame.height
+
+
+def test_round_trip_of_the_bundled_report(tmp_path):
+    header, frame = read_popcon("data/popularity-contest")
+    write_popcon_archive(tmp_path / "report.npz", header, frame)
+    restored_header, restored = read_popcon_archive(tmp_path / "report.npz")
+
+    expected = frame.sort("atime", maintain_order=True)
+    assert restored_header == header
+    assert restored["package-name"].to_list() == expected["package-name"].to_list()
+    programs = pl.when(pl.col("mru-name").is_not_null()).then(
+        pl.concat_str(pl.col("mru-dir").cast(pl.String), pl.lit("/"), pl.col("mru-name"))
+    ).alias("mru-program")
+    assert restored.select(programs)["mru-program"].to_list() == expected["mru-program"].to_list()
+    assert restored["atime"].dtype == pl.UInt32
+    assert restored["ctime"].dtype == pl.UInt32
+    assert restored["atime"].cast(pl.Int64).to_list() == expected["atime"].to_list()
+    assert restored["ctime"].cast(pl.Int64).to_list() == expected["ctime"].to_list()
+    for tag in TAGS:
+        assert restored[tag].dtype == pl.Boolean
+        assert restored[tag].to_list() == (expected["tag"] == tag).fill_null(False).to_list()
+    # The bundled report uses every tag, so none of them is trivially all False
+    assert all(restored[tag].any() for tag in TAGS)
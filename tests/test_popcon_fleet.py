@@ -0,0 +1,65 @@
+import polars as pl
+import pytest
+
+from polars_cookbook.popcon_fleet import PopconFleet, fleet_summary
+
+FOOTER = "END-POPULARITY-CONTEST-0 TIME:1387269433\n"
+
+
+def _report(path, host, time, packages):
+    header = f"POPULARITY-CONTEST-0 TIME:{time} ID:{host} ARCH:amd64 POPCONVER:1.61\n"
+    body = "".join(f"{time - 100} {time - 1000} {name} /usr/bin/{name}\n" for name in packages)
+    path.write_text(header + body + FOOTER)
+    return path
+
+
+def _by_package(frame):
+    return frame.sort("package-name")
+
+
+def test_duplicates_are_not_counted(tmp_path):
+    fleet = PopconFleet(n_workers=2)
+    first = _report(tmp_path / "a1", "host-a", 1000, ["perl", "vim"])
+    copy = tmp_path / "a2"
+    copy.write_bytes(first.read_bytes())
+    _report(tmp_path / "b", "host-b", 1000, ["perl"])
+
+    assert fleet.add_directory(tmp_path) == 2
+    assert fleet.add_reports([first]) == 0
+    assert fleet.add_reports([_report(tmp_path / "a3", "host-a", 2000, ["perl"])]) == 1
+
+
+def test_failed_report_is_retried(tmp_path):
+    fleet = PopconFleet(n_workers=1)
+    broken = tmp_path / "a"
+    broken.write_text("POPULARITY-CONTEST-0 TIME:1000 ARCH:amd64\n1 2 perl /usr/bin/perl\n")
+
+    assert fleet.add_directory(tmp_path) == 0
+    assert "no ID" in str(fleet.errors[broken])
+    with pytest.raises(ValueError):
+        fleet.summary()
+
+    _report(broken, "host-a", 1000, ["perl"])
+    assert fleet.add_directory(tmp_path) == 1
+    assert fleet.errors == {}
+    assert fleet.summary()["hosts"].to_list() == [1]
+
+
+def test_summary_is_updated_incrementally(tmp_path):
+    fleet = PopconFleet(n_workers=1)
+    fleet.add_reports([
+        _report(tmp_path / "a", "host-a", 1000, ["perl", "vim"]),
+        _report(tmp_path / "b", "host-b", 1000, ["perl", "emacs"]),
+    ])
+    fleet.summary()
+
+    # host-a drops vim and installs nano; emacs is untouched
+    fleet.add_reports([_report(tmp_path / "a2", "host-a", 2000, ["perl", "nano"])])
+    summary = fleet.summary()
+
+    assert fleet._stale == set()
+    assert _by_package(summary).equals(_by_package(fleet_summary(fleet.frame())))
+    assert dict(summary.select("package-name", "hosts").iter_rows()) == {
+        "perl": 2, "emacs": 1, "nano": 1,
+    }
+    assert summary.filter(pl.col("package-name") == "perl")["atime_age_p50"].item() == 100 / 86_400
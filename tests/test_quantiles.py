@@ -0,0 +1,11 @@
+import polars as pl
+
+from polars_cookbook.quantiles import BucketedQuantiles
+
+
+def test_to_frame_before_any_update():
+    frame = BucketedQuantiles("hour").to_frame()
+
+    assert frame.is_empty()
+    assert frame.schema == {"bucket": pl.Null, "mean": pl.Float64, "weight": pl.Float64}
+    assert BucketedQuantiles.from_frame(frame, "hour").digests == {}
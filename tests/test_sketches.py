@@ -0,0 +1,16 @@
+import pytest
+
+from polars_cookbook.sketches import SpaceSaving
+
+
+@pytest.mark.parametrize("values", [[], ["Noise", "Heating", "Noise", "Parking"]])
+def test_write_and_read_keep_capacity_and_n(tmp_path, values):
+    sketch = SpaceSaving(capacity=3).update(values)
+    sketch.write(tmp_path / "sketch.arrow")
+
+    restored = SpaceSaving.read(tmp_path / "sketch.arrow")
+
+    assert restored.capacity == 3
+    assert restored.n == len(values)
+    assert restored.state.equals(sketch.state)
+    assert restored.floor == sketch.floor
@@ -0,0 +1,32 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from polars_cookbook.startup import check_startup
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_entry_points_within_import_budget():
+    report = check_startup(cwd=str(ROOT))
+
+    failures = report.filter(~report["ok"])
+    assert failures.is_empty(), failures.to_dicts()
+
+
+def test_package_import_is_lazy():
+    code = (
+        "import sys, polars_cookbook; "
+        "print([m for m in sys.modules if m.startswith('polars_cookbook.')])"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "[]"
+
+    result = subprocess.run(
+        [sys.executable, "-W", "error::RuntimeWarning", "-c",
+         "import runpy; runpy.run_module('polars_cookbook.sketches', run_name='not_main')"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stderr
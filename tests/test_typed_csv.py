@@ -0,0 +1,21 @@
+import polars as pl
+
+from polars_cookbook.typed_csv import infer_csv_schema, read_csv_typed
+
+
+def test_identifiers_stay_strings(tmp_path):
+    path = tmp_path / "stations.csv"
+    path.write_text(
+        "climate_id,Station ID,code,temperature_c\n"
+        "7025250,5415,0042,-3.5\n"
+        "7025251,5416,0107,1.0\n"
+    )
+
+    schema = infer_csv_schema(path)
+    df = read_csv_typed(path)
+
+    assert schema["climate_id"] == pl.String
+    assert schema["Station ID"] == pl.String
+    assert schema["code"] == pl.String
+    assert schema["temperature_c"] == pl.Float32
+    assert df["code"].to_list() == ["0042", "0107"]
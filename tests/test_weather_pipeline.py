@@ -0,0 +1,31 @@
+import polars as pl
+
+from polars_cookbook.weather_pipeline import (
+    benchmark,
+    download_year,
+    download_year_sequential,
+    mock_weather_server,
+)
+
+
+def test_pipelined_download_matches_sequential(tmp_path):
+    with mock_weather_server(latency=0.01) as base_url:
+        sequential = download_year_sequential(
+            2012, tmp_path / "seq", base_url=base_url
+        ).collect()
+        pipelined, timings = download_year(
+            2012, tmp_path / "async", base_url=base_url, fetch_workers=4
+        )
+
+    assert sequential.height == 8784
+    assert pipelined.collect().equals(sequential)
+    assert set(timings["stage"]) == {"fetch", "parse", "clean", "write"}
+
+
+def test_pipelining_beats_sequential_under_latency():
+    # 12 fetches at 0.1s each: overlapping them has to show up in the wall time
+    report = benchmark(latency=0.1)
+
+    pipelined = report.filter(pl.col("run") != "sequential")
+    assert (pipelined["speedup"] > 1).all(), report
+    assert report.filter(pl.col("run").str.contains("4 fetch"))["speedup"].item() > 1.5, report